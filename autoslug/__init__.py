@@ -7,8 +7,8 @@
 #  General Public License version 3 (LGPLv3) as published by the Free
 #  Software Foundation. See the file README for copying conditions.
 #
-from autoslug.fields import AutoSlugField
+from autoslug.fields import AutoSlugField, bulk_create
 
 
 __version__ = '1.9.9'
-__all__ = ['AutoSlugField']
+__all__ = ['AutoSlugField', 'bulk_create']
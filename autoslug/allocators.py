@@ -0,0 +1,201 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Allocators hand out slug indices ("2" in "foo-2") from a counter instead of
+looking for a free one among the existing slugs, so a slug with thousands of
+duplicates (think "untitled") costs as much as a slug with one.
+
+An allocator is enabled per field::
+
+    slug = AutoSlugField(populate_from='title', unique=True,
+                         allocator='autoslug.allocators.CounterAllocator')
+
+The value may be a dotted path, a class or an instance. The default allocator
+of all fields can be set with the ``AUTOSLUG_ALLOCATOR`` setting (see
+:doc:`settings`). Allocated slugs are
+always verified against the database; if a counter is behind (e.g. some rows
+were created without it), the free index is looked up with one query, the
+counter catches up and the index is taken from the counter again.
+"""
+import hashlib
+
+# django
+from django.core.cache import caches
+from django.db import IntegrityError, router, transaction
+from django.db.models import F
+
+# this app
+from autoslug import utils
+from autoslug.settings import allocator_cache
+
+
+class BaseAllocator:
+    """
+    Base class for allocators. Subclasses implement :meth:`next_index`.
+    """
+    #: the maximum length of the slugs the allocator can keep counters for, or
+    #: `None` if unlimited (see the ``autoslug.E002`` check)
+    max_slug_length = None
+
+    def allocate(self, field, rivals, original_slug, lookups, instance=None):
+        """
+        Returns a slug based on `original_slug` which is not used by any of the
+        `rivals` (a queryset) within the scope described by `lookups`.
+        """
+        if not self.is_taken(field, rivals, original_slug):
+            return original_slug
+
+        # the counters are written next to the rows, not through the (maybe
+        # read-only) database of the rivals
+        using = router.db_for_write(field.model, instance=instance)
+        key = self.get_key(field, lookups, original_slug)
+        while True:
+            index = self.next_index(using, key)
+            slug = utils.get_indexed_slug(field, original_slug, index)
+            if not self.is_taken(field, rivals, slug):
+                return slug
+            # the counter is behind; move it up to the first free index and
+            # reserve that through the counter as well, so that concurrent
+            # writers never get the same one
+            index = self.find_free_index(field, rivals, original_slug, index + 1)
+            self.catch_up(using, key, index - 1)
+
+    def get_key(self, field, lookups, original_slug):
+        """
+        Returns the `(model, scope, slug)` tuple identifying the counter.
+        """
+        model = '%s.%s' % (field.model._meta.label_lower, field.name)
+        return model, utils.get_scope_key(lookups), original_slug
+
+    def is_taken(self, field, rivals, slug):
+        return rivals.filter(**{field.name: slug}).exists()
+
+    def find_free_index(self, field, rivals, original_slug, start):
+        digits = max(utils.SINGLE_QUERY_DIGITS, len(str(start)))
+        while True:
+            taken = utils.get_taken_slugs(field, rivals, [original_slug], digits)
+            index = utils.find_free_index(field, original_slug, taken, start, 10 ** digits)
+            if index is not None:
+                return index
+            digits += 1
+
+    def next_index(self, using, key):
+        """
+        Increments the counter identified by `key` (in the database `using`,
+        the write alias of the model) and returns the new value.
+        A new counter starts at 2 as the slug itself (index 1) is taken.
+        """
+        raise NotImplementedError
+
+    def catch_up(self, using, key, index):
+        """
+        Ensures that the counter identified by `key` is at least `index`.
+        """
+        raise NotImplementedError
+
+
+class CounterAllocator(BaseAllocator):
+    """
+    Keeps the counters in the database table of
+    :class:`autoslug.counters.models.SlugCounter` (add ``autoslug.counters``
+    to ``INSTALLED_APPS``). A counter is incremented with an atomic
+    ``UPDATE ... SET value = value + 1``, so concurrent writers never get the
+    same index. Use the ``autoslug_seed_counters`` management command to
+    create the counters for existing rows.
+
+    The counters are kept in the database the rows of the model are written
+    to. Their slugs are limited to 255 characters, so the allocator cannot be
+    used with longer fields.
+    """
+    max_slug_length = 255
+
+    def get_queryset(self, using, key):
+        from autoslug.counters.models import SlugCounter
+        model, scope, slug = key
+        return SlugCounter.objects.using(using).filter(model=model, scope=scope, slug=slug)
+
+    def next_index(self, using, key):
+        counters = self.get_queryset(using, key)
+        with transaction.atomic(using=using):
+            if not counters.update(value=F('value') + 1):
+                model, scope, slug = key
+                try:
+                    with transaction.atomic(using=using):
+                        counters.create(model=model, scope=scope, slug=slug, value=2)
+                    return 2
+                except IntegrityError:
+                    # created by a concurrent writer
+                    counters.update(value=F('value') + 1)
+            return counters.values_list('value', flat=True).get()
+
+    def catch_up(self, using, key, index):
+        self.get_queryset(using, key).filter(value__lt=index).update(value=index)
+
+
+class CacheAllocator(BaseAllocator):
+    """
+    Keeps the counters in a Django cache, so that processes on several nodes
+    can allocate indices without touching a counter table. The counters are
+    reserved with the atomic `add()` and `incr()` of the cache backend (use a
+    shared backend like Memcached or Redis in production; the local memory
+    backend only works within one process).
+
+    If a counter has been evicted or was never set, the allocated slug turns
+    out to be taken and the counter catches up after one query, so a cache
+    failure costs queries but never uniqueness.
+
+    :param cache: alias of the cache to use; defaults to the
+        ``AUTOSLUG_ALLOCATOR_CACHE`` setting (``'default'``).
+    :param timeout: lifetime of the counters in seconds; `None` (the default)
+        keeps them as long as the cache backend allows.
+    """
+    key_prefix = 'autoslug'
+
+    def __init__(self, cache=None, timeout=None):
+        self.cache_alias = cache or allocator_cache
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_cache_key(self, key):
+        # keys of some backends are limited in length and characters
+        digest = hashlib.sha1('|'.join(key).encode('utf-8')).hexdigest()
+        return '%s:%s' % (self.key_prefix, digest)
+
+    def next_index(self, using, key):
+        cache_key = self.get_cache_key(key)
+        while True:
+            self.cache.add(cache_key, 1, self.timeout)
+            try:
+                return self.cache.incr(cache_key)
+            except ValueError:
+                # evicted right after add()
+                continue
+
+    def catch_up(self, using, key, index):
+        # never move the counter back (a concurrent writer may have got
+        # further); overshooting only skips indices
+        cache_key = self.get_cache_key(key)
+        while True:
+            current = self.cache.get(cache_key)
+            if current is None:
+                if self.cache.add(cache_key, index, self.timeout):
+                    return
+                continue
+            if current >= index:
+                return
+            try:
+                self.cache.incr(cache_key, index - current)
+                return
+            except ValueError:
+                # evicted right after get()
+                continue
@@ -0,0 +1,13 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Storage for :class:`autoslug.allocators.CounterAllocator`. Add
+``autoslug.counters`` to ``INSTALLED_APPS`` and run the migrations to use it.
+"""
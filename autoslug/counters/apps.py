@@ -0,0 +1,17 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+from django.apps import AppConfig
+
+
+class CountersConfig(AppConfig):
+    name = 'autoslug.counters'
+    label = 'autoslug_counters'
+    verbose_name = 'Slug counters'
+    default_auto_field = 'django.db.models.AutoField'
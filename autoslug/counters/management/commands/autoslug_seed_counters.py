@@ -0,0 +1,94 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Creates or updates the counters of :class:`~autoslug.allocators.CounterAllocator`
+from the existing slugs of a model::
+
+    python manage.py autoslug_seed_counters blog.Article --field slug
+
+For every "foo-<n>" slug the counter of "foo" within the same uniqueness
+scope is set to at least `n`. Run it after enabling the allocator for a table
+that already has rows; otherwise the counters catch up on their own, at the
+cost of one extra query the first time each one is behind.
+"""
+import re
+
+# django
+from django.core.management.base import BaseCommand
+from django.db import router, transaction
+
+# this app
+from autoslug import utils
+from autoslug.allocators import CounterAllocator
+from autoslug.counters.models import SlugCounter
+from autoslug.management.commands.autoslug_rebuild import get_model, get_slug_field
+
+
+def get_seed_values(field, chunk_size=1000):
+    """
+    Returns a dict mapping counter keys (see
+    :meth:`~autoslug.allocators.BaseAllocator.get_key`) to the highest index
+    found in existing slugs.
+    """
+    opts = field.model._meta
+    allocator = CounterAllocator()
+    pattern = re.compile(r'^(?P<slug>.+)%s(?P<index>\d+)$' % re.escape(field.index_sep))
+
+    names = {opts.pk.attname, field.attname}
+    names.update(lookup.field.attname for lookup in field.get_uniqueness_plan())
+    queryset = field.model._base_manager.only(*names).order_by()
+
+    values = {}
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        match = pattern.match(field.value_from_object(instance) or '')
+        if not match:
+            continue
+        lookups = tuple(utils.get_uniqueness_lookups(field, instance))
+        key = allocator.get_key(field, lookups, match.group('slug'))
+        values[key] = max(values.get(key, 1), int(match.group('index')))
+    return values
+
+
+class Command(BaseCommand):
+    help = 'Creates or updates the slug counters for existing rows of a model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='the model as "app_label.ModelName"')
+        parser.add_argument('--field', help='name of the AutoSlugField'
+                            ' (may be omitted if the model has only one)')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='number of rows loaded or written at once')
+
+    def handle(self, *args, **options):
+        field = get_slug_field(get_model(options['model']), options['field'])
+        values = get_seed_values(field, options['chunk_size'])
+
+        model_key = '%s.%s' % (field.model._meta.label_lower, field.name)
+        # the allocator writes the counters to the database of the rows
+        using = router.db_for_write(field.model)
+        counters = SlugCounter.objects.using(using)
+        existing = {(c.model, c.scope, c.slug): c for c in counters.filter(model=model_key)}
+
+        created, updated = [], []
+        for key, value in values.items():
+            counter = existing.get(key)
+            if counter is None:
+                model, scope, slug = key
+                created.append(SlugCounter(model=model, scope=scope, slug=slug, value=value))
+            elif counter.value < value:
+                counter.value = value
+                updated.append(counter)
+
+        with transaction.atomic(using=using):
+            counters.bulk_create(created, batch_size=options['chunk_size'])
+            counters.bulk_update(updated, ['value'], batch_size=options['chunk_size'])
+
+        self.stdout.write('Seeded counters of %s.%s: %d created, %d updated.'
+                          % (field.model._meta.label, field.name, len(created), len(updated)))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlugCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=200)),
+                ('scope', models.CharField(max_length=40)),
+                ('slug', models.CharField(max_length=255)),
+                ('value', models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('model', 'scope', 'slug'), name='autoslug_counters_unique_key')],
+            },
+        ),
+    ]
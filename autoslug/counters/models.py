@@ -0,0 +1,32 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+from django.db.models import CharField, Model, PositiveIntegerField, UniqueConstraint
+
+
+class SlugCounter(Model):
+    """
+    The last index handed out for a slug within given model field and
+    uniqueness scope, e.g. 3 once "foo-3" has been allocated.
+    """
+    # "app_label.model_name.field_name"
+    model = CharField(max_length=200)
+    # see autoslug.utils.get_scope_key()
+    scope = CharField(max_length=40)
+    slug = CharField(max_length=255)
+    value = PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            UniqueConstraint(fields=['model', 'scope', 'slug'],
+                             name='autoslug_counters_unique_key'),
+        ]
+
+    def __str__(self):
+        return '%s: %s (%d)' % (self.model, self.slug, self.value)
@@ -8,10 +8,22 @@
 #  Software Foundation. See the file README for copying conditions.
 #
 
+# python
+import contextlib
+import functools
+import time
+
 # django
 from django.conf import settings
+from django.core import checks
+from django.core.exceptions import FieldDoesNotExist
+from django.db import IntegrityError, connections, router, transaction
+from django.db.backends.utils import truncate_name
+from django.db.models import F, Index, UniqueConstraint
 from django.db.models.fields import SlugField
-from django.db.models.signals import post_save
+from django.db.models.functions import ExtractDay, ExtractMonth, ExtractYear
+from django.db.models.signals import class_prepared, post_save
+from django.utils.module_loading import import_string
 
 # 3rd-party
 try:
@@ -20,13 +32,37 @@ except ImportError:
     modeltranslation_utils = None
 
 # this app
-from autoslug.settings import slugify, autoslug_modeltranslation_enable
-from autoslug import utils
+from autoslug.settings import slugify, slugify_cache_size, autoslug_modeltranslation_enable
+from autoslug.settings import allocator as default_allocator, collect_stats
+from autoslug import signals, stats, utils
 
-__all__ = ['AutoSlugField']
+__all__ = ['AutoSlugField', 'bulk_create']
 
 SLUG_INDEX_SEPARATOR = '-'  # the "-" in "foo-2"
 
+# instance attribute holding slugs that have been made unique in advance
+RESOLVED_SLUGS_ATTR = '_autoslug_resolved'
+
+# instance attribute telling pre_save() to resolve clashes even if the
+# collision strategy is "optimistic" (set when the first attempt has failed)
+FORCE_RESOLVE_ATTR = '_autoslug_force_resolve'
+
+# instance attribute telling pre_save() that a rejected row is going to be
+# retried (set by the save_base() wrapper of the "optimistic" strategy)
+OPTIMISTIC_SAVE_ATTR = '_autoslug_optimistic_save'
+
+# instance attribute holding the values of the tracked attributes as they were
+# loaded or last saved, for those changed since (see TrackedAttribute)
+ORIGINAL_VALUES_ATTR = '_autoslug_original'
+
+# the original value of an attribute which was set before it was loaded
+UNKNOWN = object()
+
+# candidates checked by the first query of the "windowed" strategy and the
+# factor by which each subsequent window grows
+DEFAULT_WINDOW_SIZE = 16
+DEFAULT_WINDOW_GROWTH = 2
+
 try:  # pragma: nocover
     # Python 2.x
     basestring
@@ -58,7 +94,9 @@ class AutoSlugField(SlugField):
         model instance is saved. Use with care because `cool URIs don't
         change`_ (and the slug is usually a part of object's URI). Note that
         even if the field is editable, any manual changes will be lost when
-        this option is activated.
+        this option is activated. An existing slug is kept if the source still
+        yields it (e.g. "foo-3" for "foo").
+
     :param populate_from: string or callable: if string is given, it is considered
         as the name of attribute from which to fill the slug. If callable is given,
         it should accept `instance` parameter and return a value to fill the slug
@@ -66,7 +104,8 @@ class AutoSlugField(SlugField):
     :param sep: string: if defined, overrides default separator for automatically
         incremented slug index (i.e. the "-" in "foo-2").
     :param slugify: callable: if defined, overrides `AUTOSLUG_SLUGIFY_FUNCTION`
-        defined in :doc:`settings`.
+        defined in :doc:`settings`. Memoized if `AUTOSLUG_SLUGIFY_CACHE_SIZE`
+        is set.
     :param unique: boolean: ensure total slug uniqueness (unless more precise
         `unique_with` is defined).
     :param unique_with: string or tuple of strings: name or names of attributes
@@ -79,6 +118,65 @@ class AutoSlugField(SlugField):
         reappear within a day or within some author's articles but never within
         a day for the same author. Foreign keys are also supported, i.e. not only
         `unique_with='author'` will do, but also `unique_with='author__name'`.
+        The related object is not fetched: the former compares the key of the
+        author and the latter looks up the name within the query of rivals.
+    :param collision_strategy: string: how name clashes are resolved. Default is
+        ``'linear'``: the candidates ("foo", "foo-2", "foo-3"...) are checked one
+        query at a time. ``'single_query'`` fetches all existing slugs of the
+        "foo" / "foo-<n>" family with one query and picks the lowest free index
+        in Python, which is much cheaper for slugs with many duplicates.
+        ``'windowed'`` checks `window_size` candidates per query (using an
+        ``IN`` lookup instead of ``LIKE``) and multiplies the size of the next
+        window by `window_growth` if all of them are taken.
+        ``'optimistic'`` does not check anything before saving; it relies on
+        the database to reject a duplicate slug, and only then resolves the
+        clash (like ``'single_query'``) and saves again. This takes a single
+        query in the common case and closes the race between concurrent
+        writers. With `unique_with` the field adds a `UniqueConstraint` over
+        the `unique_with` fields and the slug to the model (so it is created by
+        migrations); date lookups like ``'pub_date__month'`` become expressions.
+        Related lookups like ``'author__name'`` cannot be enforced this way, so
+        such fields keep checking the slugs before saving, and so do instances
+        with empty `unique_with` values and other ways of saving than
+        `Model.save()` (e.g. `QuerySet.bulk_create()`). A retried save calls
+        `pre_save()` (and sends :data:`~autoslug.signals.slug_generated`) twice.
+    :param allocator: an allocator (see :mod:`autoslug.allocators`) as a dotted
+        path, a class or an instance: if defined, slug indices are taken from
+        its counters instead of being looked up by the `collision_strategy`.
+        Defaults to the ``AUTOSLUG_ALLOCATOR`` setting.
+    :param window_size: integer: number of candidates checked by the first
+        query of the ``'windowed'`` collision strategy. Default is 16.
+    :param window_growth: number: factor by which the window grows with each
+        further query of the ``'windowed'`` collision strategy (rounded up, and
+        by at least one candidate). Default is 2.
+    :param unique_condition: `Q` object: only rows matching it are required to
+        have unique slugs (globally with `unique`, or within the `unique_with`
+        scope), e.g. ``Q(is_archived=False)``. The rivals are looked up among
+        these rows only, so archived rows neither clash with live ones nor push
+        up their indices. The field adds a conditional `UniqueConstraint` to
+        the model instead of a plain unique column, and the `scope_index` (if
+        any) becomes a partial index. Requires `unique` or `unique_with`.
+        Note that the slugs of a batch (see :meth:`populate_bulk`) are kept
+        apart from each other regardless of the condition.
+    :param scope_index: boolean: add a composite index over the `unique_with`
+        fields and the slug to the model (so it is created by migrations), which
+        lets the database find rivals within the scope without scanning every
+        row with the same slug. Columns compared by equality come first, then
+        the slug, then date columns (compared by ranges). Lookups through
+        relations are not indexed, and neither are the columns of the unique
+        constraint added for `unique_condition` or the ``'optimistic'``
+        strategy. Default is ``False``.
+
+    A slug that was loaded from the database (or saved) is not checked again
+    on save unless it, the `unique_with` fields or (with `always_update`) the
+    source have changed; the fields which have not been loaded (see
+    `QuerySet.only()`) have not changed and are not fetched. This is not done
+    if the slug depends on anything else, i.e. `populate_from` is a callable
+    or a property, `unique_with` goes through relations or there is a
+    `unique_condition`, nor for copies saved with a reset or changed primary
+    key. The original values are recorded when the attributes are changed
+    (see :class:`TrackedAttribute`) rather than copied from every loaded
+    instance.
 
     .. _cool URIs don't change: http://w3.org/Provider/Style/URI.html
 
@@ -108,6 +206,14 @@ class AutoSlugField(SlugField):
 
     .. code-block:: python
 
+        # let the database reject duplicates, resolve the clash only then
+        slug = AutoSlugField(populate_from='title', unique_with='pub_date__month',
+                             collision_strategy='optimistic')
+
+        # resolve name clashes with a single query regardless of duplicates
+        slug = AutoSlugField(populate_from='title', unique=True,
+                             collision_strategy='single_query')
+
         # slugify but allow non-unique slugs
         slug = AutoSlugField()
 
@@ -180,13 +286,25 @@ class AutoSlugField(SlugField):
         self.unique_with = kwargs.pop('unique_with', ())
         if isinstance(self.unique_with, basestring):
             self.unique_with = (self.unique_with,)
+        self._uniqueness_plan = None
+        self._tracked_attnames = None
+        self._localized_fields = None
+        self._combined_fields = None
 
         self.slugify = kwargs.pop('slugify', slugify)
         assert hasattr(self.slugify, '__call__')
+        if slugify_cache_size:
+            self.slugify = utils.cached_slugify(self.slugify, slugify_cache_size)
+        if collect_stats:
+            stats.registry.connect()
 
         self.index_sep = kwargs.pop('sep', SLUG_INDEX_SEPARATOR)
 
-        if self.unique_with:
+        self.unique_condition = kwargs.pop('unique_condition', None)
+        if self.unique_condition is not None and not (self.unique_with or kwargs.get('unique')):
+            raise ValueError('unique_condition requires unique=True or unique_with')
+
+        if self.unique_with or self.unique_condition is not None:
             # we will do "manual" granular check below
             kwargs['unique'] = False
 
@@ -204,6 +322,22 @@ class AutoSlugField(SlugField):
         self.manager_name = kwargs.pop('manager_name', None)
 
         self.always_update = kwargs.pop('always_update', False)
+
+        self.scope_index = kwargs.pop('scope_index', False)
+
+        self.collision_strategy = kwargs.pop('collision_strategy', 'linear')
+        if self.collision_strategy not in utils.COLLISION_STRATEGIES:
+            raise ValueError('Unknown collision strategy "%s", expected one of %s'
+                             % (self.collision_strategy,
+                                ', '.join(sorted(utils.COLLISION_STRATEGIES))))
+
+        self.allocator = kwargs.pop('allocator', default_allocator)
+
+        self.window_size = kwargs.pop('window_size', DEFAULT_WINDOW_SIZE)
+        self.window_growth = kwargs.pop('window_growth', DEFAULT_WINDOW_GROWTH)
+        if self.window_size < 1 or self.window_growth < 1:
+            raise ValueError('window_size and window_growth must be at least 1')
+
         super(SlugField, self).__init__(*args, **kwargs)
 
     def deconstruct(self):
@@ -221,8 +355,17 @@ class AutoSlugField(SlugField):
             kwargs['unique_with'] = self.unique_with
             kwargs.pop('unique', None)
 
-        if self.slugify != slugify:
-            kwargs['slugify'] = self.slugify
+        if self.unique_condition is not None:
+            kwargs['unique_condition'] = self.unique_condition
+            if not self.unique_with:
+                kwargs['unique'] = True
+
+        # the cache wrapper (if any) is not a part of the configuration
+        original_slugify = self.slugify
+        if isinstance(original_slugify, utils.CachedSlugify):
+            original_slugify = original_slugify.__wrapped__
+        if original_slugify != slugify:
+            kwargs['slugify'] = original_slugify
 
         if self.index_sep != SLUG_INDEX_SEPARATOR:
             kwargs['sep'] = self.index_sep
@@ -238,25 +381,382 @@ class AutoSlugField(SlugField):
         if self.always_update:
             kwargs['always_update'] = self.always_update
 
+        if self.collision_strategy != 'linear':
+            kwargs['collision_strategy'] = self.collision_strategy
+
+        if self.window_size != DEFAULT_WINDOW_SIZE:
+            kwargs['window_size'] = self.window_size
+
+        if self.window_growth != DEFAULT_WINDOW_GROWTH:
+            kwargs['window_growth'] = self.window_growth
+
+        if self.scope_index:
+            kwargs['scope_index'] = self.scope_index
+
         if 'manager' in kwargs:
             del kwargs['manager']
 
         return name, path, args, kwargs
 
-    def pre_save(self, instance, add):
-
-        # get currently entered slug
-        value = self.value_from_object(instance)
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super().contribute_to_class(cls, name, *args, **kwargs)
+        if not cls._meta.abstract:
+            class_prepared.connect(self.prepare_model, sender=cls)
+
+    def prepare_model(self, sender, **kwargs):
+        """
+        Adds to the model what the field needs once the model class is ready.
+        """
+        try:
+            self.get_uniqueness_plan()
+        except ValueError:
+            # reported by check() and raised again on save
+            pass
 
+        constraint = None
+        if self.collision_strategy == 'optimistic' or self.unique_condition is not None:
+            constraint = self.get_unique_constraint()
+            if constraint is not None:
+                add_constraint(sender, constraint)
+
+        if self.scope_index:
+            index = self.get_scope_index()
+            # the unique constraint is backed by an index over the same columns
+            if index is not None and not (
+                    constraint is not None and constraint.fields
+                    and set(index.fields) <= set(constraint.fields)
+                    and constraint.condition == index.condition):
+                add_index(sender, index)
+
+        self._tracked_attnames = self.get_tracked_attnames()
+        if self._tracked_attnames and (self.requires_unique_slug() or self.always_update):
+            for attname in (sender._meta.pk.attname, *self._tracked_attnames):
+                track_attribute(sender, attname)
+            post_save.connect(forget_original_values, sender=sender)
+        else:
+            self._tracked_attnames = None
+
+        if self.collision_strategy == 'optimistic':
+            if not getattr(sender.save_base, 'resolves_slug_clashes', False):
+                sender.save_base = retry_on_slug_clash(sender.save_base)
+
+    def get_uniqueness_plan(self):
+        """
+        Returns the `unique_with` entries compiled against the model (see
+        :func:`~autoslug.utils.compile_uniqueness_lookups`). The plan (or the
+        configuration error) is computed once, when the model class is ready.
+        """
+        if self._uniqueness_plan is None:
+            try:
+                self._uniqueness_plan = utils.compile_uniqueness_lookups(
+                    self, self.model, self.unique_with)
+            except ValueError as exc:
+                self._uniqueness_plan = exc
+        if isinstance(self._uniqueness_plan, ValueError):
+            raise self._uniqueness_plan
+        return self._uniqueness_plan
+
+    def get_unique_constraint(self):
+        """
+        Returns a `UniqueConstraint` enforcing the `unique_with` uniqueness of
+        the slug (limited to rows matching `unique_condition`) or `None` if there
+        is no need for it (neither `unique_with` nor `unique_condition`) or it
+        cannot be expressed (lookups through relations).
+        """
+        if not self.unique_with and self.unique_condition is None:
+            return None
+
+        try:
+            plan = self.get_uniqueness_plan()
+        except ValueError:
+            # reported by check()
+            return None
+
+        opts = self.model._meta
+        expressions = []
+        for lookup in plan:
+            if lookup.date_parts:
+                extracts = {'year': ExtractYear, 'month': ExtractMonth, 'day': ExtractDay}
+                expressions.extend(extracts[part](lookup.name) for part in lookup.date_parts)
+            elif lookup.inner_lookup:
+                return None
+            else:
+                expressions.append(F(lookup.name))
+
+        name = truncate_name('%s_%s_uniq' % (opts.db_table, self.name), 63)
+        if all(isinstance(expression, F) for expression in expressions):
+            fields = [expression.name for expression in expressions] + [self.name]
+            return UniqueConstraint(fields=fields, name=name, condition=self.unique_condition)
+        return UniqueConstraint(*expressions, F(self.name), name=name,
+                                condition=self.unique_condition)
+
+    def get_scope_fields(self):
+        """
+        Returns the names of the fields to index for rival lookups (see
+        `scope_index`) or an empty list if the scope can't be indexed.
+        """
+        try:
+            plan = self.get_uniqueness_plan()
+        except ValueError:
+            # reported by check()
+            return []
+        local = [lookup for lookup in plan if not lookup.inner_lookup]
+        if not local:
+            return []
+        # equality first, ranges last
+        return ([lookup.name for lookup in local if not lookup.date_parts] + [self.name] +
+                [lookup.name for lookup in local if lookup.date_parts])
+
+    def get_scope_index(self):
+        """
+        Returns an `Index` over the fields returned by :meth:`get_scope_fields`
+        (partial if there is a `unique_condition`) or `None` if there are none.
+        """
+        fields = self.get_scope_fields()
+        if not fields:
+            return None
+        index = Index(fields=fields)
+        index.set_name_with_model(self.model)
+        if self.unique_condition is not None:
+            # partial indexes must be named upfront
+            index = Index(fields=fields, name=index.name, condition=self.unique_condition)
+        return index
+
+    def has_scope_index(self):
+        """
+        Returns True if the rivals can be looked up by an index: either one
+        covering the slug and all of the fields returned by
+        :meth:`get_scope_fields`, or one on each of the `unique_with` fields
+        (e.g. the index of a foreign key).
+        """
+        opts = self.model._meta
+        wanted = set(self.get_scope_fields())
+        # partial ones are only usable with the condition of rival queries
+        conditions = (None, self.unique_condition)
+        candidates = [index.fields for index in opts.indexes if index.condition in conditions]
+        candidates.extend(constraint.fields for constraint in opts.constraints
+                          if isinstance(constraint, UniqueConstraint)
+                          and constraint.condition in conditions)
+        candidates.extend(opts.unique_together)
+        if any(wanted <= set(fields) for fields in candidates):
+            return True
+        # the leading column of a composite index can be used on its own
+        leading = {fields[0] for fields in candidates if fields}
+        for name in wanted - {self.name}:
+            field = opts.get_field(name)
+            if not (field.db_index or field.unique or name in leading):
+                return False
+        return True
+
+    def relies_on_constraint(self, instance):
+        """
+        Returns True if the database is going to reject a duplicate slug of
+        given instance, so that the clashes need not be checked in advance.
+        This is only the case within the first attempt of `Model.save()` (see
+        :func:`retry_on_slug_clash`); other ways to save the instance, e.g.
+        `QuerySet.bulk_create()`, do not retry the rejected rows.
+        """
+        if self.collision_strategy != 'optimistic':
+            return False
+        if not instance.__dict__.get(OPTIMISTIC_SAVE_ATTR):
+            return False
+        if not self.unique_with and self.unique_condition is None:
+            return self.unique
+        if self.get_unique_constraint() is None:
+            return False
+        # NULL values are never equal, so the constraint would let them through
+        return all(getattr(instance, lookup.field.attname) is not None
+                   for lookup in self.get_uniqueness_plan())
+
+    def check(self, **kwargs):
+        errors = super().check(**kwargs)
+        try:
+            self.get_uniqueness_plan()
+        except ValueError as exc:
+            errors.append(checks.Error(
+                str(exc),
+                hint='Fix the `unique_with` argument of the field.',
+                obj=self,
+                id='autoslug.E001',
+            ))
+        if (self.collision_strategy == 'optimistic' and self.unique_with
+                and self.get_unique_constraint() is None):
+            errors.append(checks.Warning(
+                'The `unique_with` constraint of %s.%s cannot be enforced by the'
+                ' database, so the "optimistic" collision strategy checks the'
+                ' slugs before saving anyway.' % (self.model._meta.object_name, self.name),
+                hint='Use only fields of the model itself in `unique_with`.',
+                obj=self,
+                id='autoslug.W001',
+            ))
+        allocator = self.get_allocator()
+        limit = getattr(allocator, 'max_slug_length', None)
+        if limit and self.max_length > limit:
+            errors.append(checks.Error(
+                'The allocator of %s.%s keeps counters for slugs of up to %d'
+                ' characters, but the field allows %d.'
+                % (self.model._meta.object_name, self.name, limit, self.max_length),
+                hint='Set max_length=%d or use another allocator.' % limit,
+                obj=self,
+                id='autoslug.E002',
+            ))
+        if self.unique_with and self.get_scope_fields() and not self.has_scope_index():
+            errors.append(checks.Warning(
+                'Rivals of %s.%s are looked up by the `unique_with` fields and the'
+                ' slug, but some of these fields have no index.'
+                % (self.model._meta.object_name, self.name),
+                hint='Set scope_index=True or add an index over %s.'
+                     % ', '.join(self.get_scope_fields()),
+                obj=self,
+                id='autoslug.W002',
+            ))
+        return errors
+
+    def get_tracked_attnames(self):
+        """
+        Returns the attnames of the slug, the `unique_with` fields and, with
+        `always_update`, the `populate_from` field, i.e. the columns which tell
+        whether the slug can be kept as is on save (see
+        :meth:`get_unchanged_slug`), or `None` if it depends on something else
+        (a callable or a property, a lookup through a relation or a
+        `unique_condition`).
+        """
+        source_tracked = self.always_update and self.populate_from
+        if self.unique_condition is not None or (source_tracked and callable(self.populate_from)):
+            return None
+        attnames = [self.attname]
+        if source_tracked:
+            try:
+                source = self.model._meta.get_field(self.populate_from)
+            except FieldDoesNotExist:
+                return None
+            if source.is_relation or not source.concrete:
+                return None
+            attnames.append(source.attname)
+        try:
+            plan = self.get_uniqueness_plan()
+        except ValueError:
+            return None
+        if any(lookup.inner_lookup for lookup in plan):
+            return None
+        attnames.extend(lookup.field.attname for lookup in plan)
+        return tuple(attnames)
+
+    def get_changed_attnames(self, instance):
+        """
+        Returns the set of tracked attnames of given instance whose values have
+        changed since it was loaded (or last saved) or `None` if that is not
+        known, e.g. if the primary key has been reset or changed to save a copy
+        of the instance. Attnames which are still deferred have not changed.
+        """
+        if not self._tracked_attnames or instance._state.adding or instance.pk is None:
+            return None
+        model = type(instance)
+        pk_attname = model._meta.pk.attname
+        # the attributes may have been replaced (e.g. by modeltranslation)
+        if not all(isinstance(getattr(model, attname, None), TrackedAttribute)
+                   for attname in (pk_attname, *self._tracked_attnames)):
+            return None
+        original = instance.__dict__.get(ORIGINAL_VALUES_ATTR)
+        if not original:
+            return set()
+        if pk_attname in original and original[pk_attname] != instance.pk:
+            return None
+        return {attname for attname in self._tracked_attnames
+                if attname in original and original[attname] != instance.__dict__.get(attname)}
+
+    def get_source_attname(self):
+        """
+        Returns the tracked attname of the `populate_from` field or `None`.
+        """
+        if self._tracked_attnames and self.always_update and self.populate_from:
+            return self._tracked_attnames[1]
+        return None
+
+    def get_unchanged_slug(self, instance):
+        """
+        Returns the slug of given instance as it was loaded (or last saved) if
+        it can be kept without any checks: neither the slug nor the `unique_with`
+        fields have changed since and, with `always_update`, the source still
+        yields the same slug (e.g. "foo-3" is kept for "foo"). Otherwise returns
+        `None`.
+        """
+        if instance.__dict__.get(FORCE_RESOLVE_ATTR):
+            return None
+        changed = self.get_changed_attnames(instance)
+        slug = instance.__dict__.get(self.attname)
+        if changed is None or not slug:
+            return None
+        if not changed:
+            return slug
+
+        # without `always_update` the source is not tracked: it only fills an
+        # empty slug
+        if changed != {self.get_source_attname()}:
+            return None
+        base = self.get_slug_base(instance)
+        if slug == base:
+            return slug
+        prefix = base + self.index_sep
+        if slug.startswith(prefix) and slug[len(prefix):].isdigit():
+            return slug
+        return None
+
+    def needs_source(self, instance):
+        """
+        Returns True if the slug of given instance has to be regenerated from a
+        source which may have changed since the instance was loaded (i.e. with
+        `always_update`).
+        """
+        if not (self.always_update and self.populate_from):
+            return False
+        changed = self.get_changed_attnames(instance)
+        return changed is None or self.get_source_attname() in changed
+
+    def requires_unique_slug(self):
+        """
+        Returns True if the slug must not clash with other slugs (globally,
+        within the `unique_with` scope or among rows matching
+        `unique_condition`).
+        """
+        return bool(self.unique or self.unique_with or self.unique_condition is not None)
+
+    def get_allocator(self):
+        """
+        Returns the allocator instance of the field or `None`.
+        """
+        if isinstance(self.allocator, str):
+            self.allocator = import_string(self.allocator)
+        if isinstance(self.allocator, type):
+            self.allocator = self.allocator()
+        return self.allocator
+
+    def get_manager(self):
+        """
+        Returns the manager used to look up rivals or `None` if the default
+        manager of the model should be used.
+        """
         if self.manager is not None:
-            manager = self.manager
-        elif self.manager_name is not None:
-            manager = getattr(self.model, self.manager_name)
+            return self.manager
+        if self.manager_name is not None:
+            return getattr(self.model, self.manager_name)
+        return None
+
+    def get_slug_source(self, instance, regenerate=False):
+        """
+        Returns the value to be slugified for given instance: the current value
+        of the field or, if it is empty, `always_update` is set or `regenerate`
+        is True, the value taken from `populate_from`.
+        """
+        if self.populate_from and (self.always_update or regenerate):
+            # the current value is going to be replaced anyway
+            value = None
         else:
-            manager = None
+            # get currently entered slug
+            value = self.value_from_object(instance)
 
         # autopopulate
-        if self.always_update or (self.populate_from and not value):
+        if self.populate_from and not value:
             value = utils.get_prepopulated_value(self, instance)
 
             # pragma: nocover
@@ -264,74 +764,487 @@ class AutoSlugField(SlugField):
                 print('Failed to populate slug %s.%s from %s' % \
                       (instance._meta.object_name, self.name, self.populate_from))
 
+        return value
+
+    def make_slug(self, value, model_name):
+        """
+        Returns the slugified and cropped `value`. If nothing is left of it, the
+        slug falls back to `model_name` (or to an empty value if the field is
+        allowed to be blank).
+        """
+        # functions like autoslug.utils.fast_slugify() crop the slug themselves
+        crops = getattr(self.slugify, 'accepts_max_length', False)
+
         slug = None
         if value:
-            slug = self.slugify(value)
+            if crops:
+                slug = self.slugify(value, max_length=self.max_length)
+            else:
+                slug = self.slugify(value)
         if not slug:
             slug = None
+            crops = False
 
             if not self.blank:
-                slug = instance._meta.model_name
+                slug = model_name
             elif not self.null:
                 slug = ''
 
-        if slug:
+        if slug and not crops:
             slug = self.slugify(utils.crop_slug(self, slug))
 
-            # ensure the slug is unique (if required)
-            if self.unique or self.unique_with:
-                slug = utils.generate_unique_slug(self, instance, slug, manager)
+        return slug
+
+    def get_slug_base(self, instance, regenerate=False):
+        """
+        Returns the slugified and cropped value for given instance without
+        checking its uniqueness (see :meth:`get_slug_source`).
+        """
+        value = self.get_slug_source(instance, regenerate)
+        return self.make_slug(value, instance._meta.model_name)
+
+    def populate_bulk(self, instances, regenerate=False):
+        """
+        Fills the field for all given instances at once, e.g. before passing
+        them to `QuerySet.bulk_create()` which does not call `pre_save()`.
+
+        Instances are grouped by their `unique_with` lookups; existing slugs are
+        fetched with one query per group and clashes (including the ones within
+        the batch itself) are resolved in memory. If `regenerate` is True, the
+        slugs are computed anew even if the instances already have them.
+
+        Returns the list of slugs in the order of given instances.
+        """
+        instances = list(instances)
+        if not signals.slugs_generated.has_listeners(self.model):
+            return self._populate_bulk(instances, regenerate)
+
+        event = {}
+        counter = utils.QueryCounter()
+        with connections[self.get_db()].execute_wrapper(counter):
+            slugs = self._populate_bulk(instances, regenerate, event)
+        bases = event['bases']
+        signals.slugs_generated.send(
+            sender=self.model, field=self, instances=instances, bases=bases, slugs=slugs,
+            candidates=[utils.get_slug_index(self, base, slug) for base, slug in zip(bases, slugs)],
+            queries=counter.queries, db_time=counter.time, slugify_time=event['slugify_time'])
+        return slugs
+
+    def _populate_bulk(self, instances, regenerate=False, event=None):
+        # see populate_bulk(); fills `event` with the base slugs and the
+        # slugify time for the slugs_generated signal if given
+        self.populate_localized_bulk(instances, regenerate)
+        if event is not None:
+            started = time.perf_counter()
+        slugs = [self.get_slug_base(instance, regenerate) for instance in instances]
+        if event is not None:
+            event['slugify_time'] = time.perf_counter() - started
+            event['bases'] = slugs
+
+        if self.requires_unique_slug():
+            slugs = utils.generate_unique_slugs(self, instances, slugs, self.get_manager())
+
+        for instance, slug in zip(instances, slugs):
+            setattr(instance, self.name, slug)
+            # let pre_save() know that the slug needs no further checks
+            # (bulk_create() calls it for each instance)
+            instance.__dict__.setdefault(RESOLVED_SLUGS_ATTR, {})[self.name] = slug
+
+        return slugs
+
+    def pop_resolved_slug(self, instance):
+        """
+        Returns the slug resolved in advance for given instance (e.g. by
+        :meth:`populate_bulk`) if it is still the current value of the field,
+        otherwise `None`. The slug is only returned once.
+        """
+        resolved = instance.__dict__.get(RESOLVED_SLUGS_ATTR)
+        if not resolved or self.name not in resolved:
+            return None
+        slug = resolved.pop(self.name)
+        if slug != self.value_from_object(instance):
+            return None
+        return slug
+
+    def get_localized_fields(self):
+        """
+        Returns `(field, source_name)` pairs for the localized versions of the
+        field added by modeltranslation (if the support is enabled, see
+        :doc:`settings`): one per language in which both the slug and the
+        `populate_from` field are translated. The list is built on first use
+        because translations are registered after the model is prepared.
+        """
+        if self._localized_fields is None:
+            self._localized_fields = []
+            if (modeltranslation_utils and autoslug_modeltranslation_enable
+                    and 'modeltranslation' in settings.INSTALLED_APPS
+                    and isinstance(self.populate_from, str)
+                    # not a localized field itself
+                    and not hasattr(self, 'translated_field')):
+                opts = self.model._meta
+                for lang_code, _ in settings.LANGUAGES:
+                    lang_code = lang_code.replace('-', '_')
+                    build_name = modeltranslation_utils.build_localized_fieldname
+                    source_name = build_name(self.populate_from, lang_code)
+                    try:
+                        field = opts.get_field(build_name(self.name, lang_code))
+                        opts.get_field(source_name)
+                    except FieldDoesNotExist:
+                        continue
+                    self._localized_fields.append((field, source_name))
+        return self._localized_fields
+
+    def populate_localized(self, instance):
+        """
+        Fills the localized versions of the field (see
+        :meth:`get_localized_fields`) which are empty (or all of them with
+        `always_update`) from the localized sources. Unique slugs are resolved
+        with one query for all languages (see
+        :func:`~autoslug.utils.generate_localized_slugs`). The localized fields
+        then save the slugs as they are, along with the rest of the row.
+        """
+        localized_fields = self.get_localized_fields()
+        if not localized_fields:
+            return
+
+        resolved = instance.__dict__.setdefault(RESOLVED_SLUGS_ATTR, {})
+        pending = []
+        for field, source_name in localized_fields:
+            if field.attname not in instance.__dict__:
+                # deferred, so not changed
+                continue
+            if field.name in resolved:
+                # resolved in advance (see populate_localized_bulk())
+                continue
+            slug = field.value_from_object(instance)
+            if slug and not self.always_update:
+                resolved[field.name] = slug
+                continue
+            source = getattr(instance, source_name)
+            pending.append((field, field.make_slug(source, instance._meta.model_name)))
+
+        slugs = [slug for field, slug in pending]
+        if pending and self.requires_unique_slug():
+            slugs = utils.generate_localized_slugs(self, instance, pending, self.get_manager())
+
+        for (field, _), slug in zip(pending, slugs):
+            setattr(instance, field.attname, slug)
+            resolved[field.name] = slug
+
+    def populate_localized_bulk(self, instances, regenerate=False):
+        """
+        Bulk counterpart of :meth:`populate_localized`: fills the localized
+        versions of the field for all given instances, resolving the clashes
+        within each localized column like :meth:`populate_bulk` does.
+        """
+        for field, source_name in self.get_localized_fields():
+            pending = []
+            for instance in instances:
+                if field.attname not in instance.__dict__:
+                    continue
+                if field.value_from_object(instance) and not (self.always_update or regenerate):
+                    continue
+                source = getattr(instance, source_name)
+                pending.append((instance, field.make_slug(source, instance._meta.model_name)))
+            if not pending:
+                continue
+
+            pending_instances = [instance for instance, slug in pending]
+            slugs = [slug for instance, slug in pending]
+            if self.requires_unique_slug():
+                slugs = utils.generate_unique_slugs(field, pending_instances, slugs,
+                                                    self.get_manager())
+            for instance, slug in zip(pending_instances, slugs):
+                setattr(instance, field.attname, slug)
+                resolved = instance.__dict__.setdefault(RESOLVED_SLUGS_ATTR, {})
+                resolved[field.name] = slug
+
+    def get_combined_fields(self):
+        """
+        Returns the unique AutoSlugFields of the model (this one included) if
+        there are several of them and this one comes first, i.e. it is saved
+        first; otherwise an empty list (see :meth:`resolve_combined`). Fields
+        depending on fields which come after this one (and may be filled by
+        their `pre_save()`, e.g. ``auto_now_add``) are left out.
+        """
+        if self._combined_fields is None:
+            fields = [field for field in self.model._meta.concrete_fields
+                      if isinstance(field, AutoSlugField) and field.requires_unique_slug()
+                      # not a modeltranslation field
+                      and not hasattr(field, 'translated_field')]
+            if fields and fields[0] is self:
+                fields = [field for field in fields if field.is_saved_after_sources(self)]
+            if len(fields) > 1 and fields[0] is self:
+                self._combined_fields = fields
+            else:
+                self._combined_fields = []
+        return self._combined_fields
+
+    def is_saved_after_sources(self, field):
+        """
+        Returns True if the `populate_from` and `unique_with` fields of this
+        field come before given field, so they are filled when it is saved.
+        """
+        opts = self.model._meta
+        try:
+            sources = [lookup.field for lookup in self.get_uniqueness_plan()]
+        except ValueError:
+            return False
+        if isinstance(self.populate_from, str):
+            try:
+                sources.append(opts.get_field(self.populate_from))
+            except FieldDoesNotExist:
+                # a method or a property
+                pass
+        fields = opts.concrete_fields
+        position = fields.index(field)
+        return all(source in fields[:position] for source in sources)
+
+    def resolve_combined(self, instance):
+        """
+        Resolves the slugs of all unique AutoSlugFields of the model at once
+        (see :meth:`get_combined_fields`). The fields which share the scope
+        (the `unique_with` lookups, the `unique_condition` and the manager) get
+        their rivals from one query, and each field then saves its slug as it
+        is. Fields with an allocator or relying on a constraint, and fields
+        which share the scope with no other field, are left to themselves.
+        """
+        resolved = instance.__dict__.setdefault(RESOLVED_SLUGS_ATTR, {})
+        groups = {}
+        for field in self.get_combined_fields():
+            if field.name in resolved or field.attname not in instance.__dict__:
+                # resolved in advance or deferred
+                continue
+            if field.get_allocator() is not None or field.relies_on_constraint(instance):
+                continue
+            if field.get_unchanged_slug(instance) is not None:
+                continue
+            slug = field.get_slug_base(instance)
+            if not slug:
+                continue
+            condition = field.unique_condition
+            key = (tuple(utils.get_uniqueness_lookups(field, instance)),
+                   None if condition is None else str(condition), field.get_manager())
+            groups.setdefault(key, []).append((field, slug))
+
+        for (lookups, condition, manager), field_slugs in groups.items():
+            if len(field_slugs) < 2:
+                continue
+            field = field_slugs[0][0]
+            rivals = utils.get_rivals(field, manager or field.model._default_manager, lookups)
+            if instance.pk:
+                rivals = rivals.exclude(pk=instance.pk)
+            slugs = utils.generate_slugs_together(rivals, field_slugs)
+            for (field, _), slug in zip(field_slugs, slugs):
+                setattr(instance, field.attname, slug)
+                resolved[field.name] = slug
+
+    def get_db(self):
+        """
+        Returns the alias of the database queried for rivals.
+        """
+        return (self.get_manager() or self.model._default_manager).db
+
+    def pre_save(self, instance, add):
+        if not signals.slug_generated.has_listeners(type(instance)):
+            return self.generate_slug(instance)
+
+        event = {'base': None, 'slugify_time': 0.0}
+        counter = utils.QueryCounter()
+        with connections[self.get_db()].execute_wrapper(counter):
+            slug = self.generate_slug(instance, event)
+        if not isinstance(slug, F):
+            base = event['base']
+            signals.slug_generated.send(
+                sender=type(instance), field=self, instance=instance, base=base, slug=slug,
+                candidates=utils.get_slug_index(self, base, slug),
+                queries=counter.queries, db_time=counter.time,
+                slugify_time=event['slugify_time'])
+        return slug
 
-            assert slug, 'value is filled before saving'
+    def generate_slug(self, instance, event=None):
+        """
+        Returns the slug to be saved for given instance (see :meth:`pre_save`),
+        filling `event` with the base slug and the time spent computing it (see
+        :data:`~autoslug.signals.slug_generated`) if given.
+        """
+        self.populate_localized(instance)
+        if self.get_combined_fields():
+            self.resolve_combined(instance)
+
+        slug = self.pop_resolved_slug(instance)
+        if slug is not None:
+            return slug
+
+        if self.attname not in instance.__dict__ and not self.needs_source(instance):
+            # the slug is deferred (and saved because of `update_fields`), so
+            # it has not been changed either; don't fetch it
+            return F(self.attname)
+
+        slug = self.get_unchanged_slug(instance)
+        if slug is None:
+            if event is not None:
+                started = time.perf_counter()
+            slug = self.get_slug_base(instance)
+            if event is not None:
+                event['slugify_time'] = time.perf_counter() - started
+                event['base'] = slug
+
+            if slug:
+                # ensure the slug is unique (if required)
+                if self.requires_unique_slug() and not self.relies_on_constraint(instance):
+                    slug = utils.generate_unique_slug(self, instance, slug, self.get_manager())
+
+                assert slug, 'value is filled before saving'
 
         # make the updated slug available as instance attribute
         setattr(instance, self.name, slug)
 
-        # modeltranslation support
-        if 'modeltranslation' in settings.INSTALLED_APPS \
-                and not hasattr(self.populate_from, '__call__') \
-                and autoslug_modeltranslation_enable:
-            post_save.connect(modeltranslation_update_slugs, sender=type(instance))
-
         return slug
 
 
-def modeltranslation_update_slugs(sender, **kwargs):
-    # https://bitbucket.org/neithere/django-autoslug/pull-request/11/modeltranslation-support-fix-issue-19/
-    # http://django-modeltranslation.readthedocs.org
-    #
-    # TODO: tests
-    #
-    if not modeltranslation_utils:
+def add_constraint(model, constraint):
+    """
+    Adds given constraint to the model options (unless it is already there,
+    e.g. in a historical model built by migrations) so that migrations see it.
+    """
+    opts = model._meta
+    if any(existing.name == constraint.name for existing in opts.constraints):
         return
+    opts.constraints = [*opts.constraints, constraint]
+    opts.original_attrs['constraints'] = opts.constraints
 
-    instance = kwargs['instance']
-    slugs = {}
 
-    for field in instance._meta.fields:
-        if type(field) != AutoSlugField:
-            continue
-        if not field.populate_from:
-            continue
-        for lang in settings.LANGUAGES:
-            lang_code, _ = lang
-            lang_code = lang_code.replace('-', '_')
+def add_index(model, index):
+    """
+    Adds given (named) index to the model options unless it is already there
+    (see :func:`add_constraint`).
+    """
+    opts = model._meta
+    if any(existing.name == index.name for existing in opts.indexes):
+        return
+    opts.indexes = [*opts.indexes, index]
+    opts.original_attrs['indexes'] = opts.indexes
 
-            populate_from_localized = modeltranslation_utils.build_localized_fieldname(field.populate_from, lang_code)
-            field_name_localized = modeltranslation_utils.build_localized_fieldname(field.name, lang_code)
 
-            # The source field or the slug field itself may not be registered
-            # with translator
-            if not hasattr(instance, populate_from_localized):
-                continue
-            if not hasattr(instance, field_name_localized):
-                continue
+class TrackedAttribute:
+    """
+    Wraps the descriptor of a model attribute to record its value before it is
+    first changed (see :meth:`AutoSlugField.get_changed_attnames`). Values set
+    while the instance is being created or loaded are not recorded.
+    """
+    def __init__(self, descriptor, attname):
+        self.descriptor = descriptor
+        self.attname = attname
+        # e.g. the descriptor of a foreign key clears the cached object
+        self.setter = getattr(descriptor, '__set__', None)
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        try:
+            return instance.__dict__[self.attname]
+        except KeyError:
+            # deferred
+            return self.descriptor.__get__(instance, cls)
+
+    def __set__(self, instance, value):
+        data = instance.__dict__
+        if self.attname in data:
+            original = data.get(ORIGINAL_VALUES_ATTR)
+            if original is None:
+                original = data[ORIGINAL_VALUES_ATTR] = {}
+            original.setdefault(self.attname, data[self.attname])
+        elif not instance._state.adding:
+            # set before the deferred value was loaded
+            data.setdefault(ORIGINAL_VALUES_ATTR, {}).setdefault(self.attname, UNKNOWN)
+        if self.setter is None:
+            data[self.attname] = value
+        else:
+            self.setter(instance, value)
 
-            populate_from_value = getattr(instance, populate_from_localized)
-            field_value = getattr(instance, field_name_localized)
 
-            if not field_value or field.always_update:
-                slug = field.slugify(populate_from_value)
-                slugs[field_name_localized] = slug
+def track_attribute(model, attname):
+    """
+    Replaces the descriptor of given attribute of the model with a
+    :class:`TrackedAttribute` (unless it is one already).
+    """
+    descriptor = getattr(model, attname)
+    if not isinstance(descriptor, TrackedAttribute):
+        setattr(model, attname, TrackedAttribute(descriptor, attname))
+
+
+def forget_original_values(sender, instance, update_fields=None, **kwargs):
+    """
+    Forgets the original values of the attributes which have been saved.
+    """
+    original = instance.__dict__.get(ORIGINAL_VALUES_ATTR)
+    if not original:
+        return
+    if update_fields is None:
+        del instance.__dict__[ORIGINAL_VALUES_ATTR]
+        return
+    saved = {sender._meta.get_field(name).attname for name in update_fields}
+    # a copy of the instance may share the dict
+    instance.__dict__[ORIGINAL_VALUES_ATTR] = {
+        attname: value for attname, value in original.items() if attname not in saved}
 
-    sender.objects.filter(pk=instance.pk).update(**slugs)
+
+def retry_on_slug_clash(save_base):
+    """
+    Wraps `Model.save_base()` for models with "optimistic" slug fields: if the
+    database rejects the row, the slugs are resolved and the row saved again.
+    """
+    @functools.wraps(save_base)
+    def wrapper(self, *args, **kwargs):
+        if self.__dict__.get(FORCE_RESOLVE_ATTR):
+            return save_base(self, *args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(self.__class__, instance=self)
+        if connections[using].in_atomic_block:
+            # a failed statement must not break the surrounding transaction
+            attempt = transaction.atomic(using=using)
+        else:
+            # in autocommit mode the failed statement leaves nothing behind
+            attempt = contextlib.nullcontext()
+
+        state = dict(self.__dict__)
+        self.__dict__[OPTIMISTIC_SAVE_ATTR] = True
+        try:
+            with attempt:
+                return save_base(self, *args, **kwargs)
+        except IntegrityError:
+            # probably a slug clash; forget what the failed attempt has set
+            self.__dict__.clear()
+            self.__dict__.update(state, **{FORCE_RESOLVE_ATTR: True})
+            try:
+                return save_base(self, *args, **kwargs)
+            finally:
+                self.__dict__.pop(FORCE_RESOLVE_ATTR, None)
+        finally:
+            self.__dict__.pop(OPTIMISTIC_SAVE_ATTR, None)
+
+    wrapper.resolves_slug_clashes = True
+    return wrapper
+
+
+def bulk_create(model, objs, **kwargs):
+    """
+    Populates all `AutoSlugField` fields of given model instances (see
+    :meth:`AutoSlugField.populate_bulk`) and inserts the instances with a single
+    call to `bulk_create()` of the default manager. Extra keyword arguments are
+    passed to `bulk_create()`.
+
+    .. code-block:: python
+
+        import autoslug
+
+        autoslug.bulk_create(Article, [Article(title=title) for title in titles])
+
+    """
+    objs = list(objs)
+    for field in model._meta.concrete_fields:
+        # the localized versions of a field are filled along with it
+        if isinstance(field, AutoSlugField) and not hasattr(field, 'translated_field'):
+            field.populate_bulk(objs)
+    return model._default_manager.bulk_create(objs, **kwargs)
@@ -0,0 +1,402 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Regenerates the slugs of all rows of a model, e.g. after adding an
+`AutoSlugField` to an existing table or changing its `slugify` function::
+
+    python manage.py autoslug_rebuild blog.Article --field slug --chunk-size 2000
+
+Rows are streamed in primary key order and only the columns needed to compute
+the slugs are loaded. Each chunk is resolved with
+:meth:`~autoslug.fields.AutoSlugField.populate_bulk` and written back with one
+`bulk_update()`. The result is the same as saving every row in primary key
+order. If the command is interrupted, run it again with ``--resume-from``
+and the last primary key it reported.
+
+Slugifying (especially with transliteration) is CPU-bound, so the rebuild can
+be spread over a pool of processes with ``--workers``:
+
+* if the field has `unique_with`, rows are partitioned by their uniqueness
+  scope (e.g. the month for ``unique_with='pub_date__month'``) and each scope
+  is rebuilt by one worker; rows of different scopes never clash, so the
+  workers need no coordination;
+* otherwise the workers only slugify the values (without touching the
+  database) and the main process resolves the clashes in memory and writes
+  the slugs. Fields with a `unique_condition` (and no `unique_with`) are
+  rebuilt in the main process only.
+
+The command reports the throughput of each worker.
+"""
+import collections
+import concurrent.futures
+import itertools
+import multiprocessing
+import os
+import time
+
+# django
+import django
+from django.apps import apps
+from django.core.exceptions import FieldDoesNotExist
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+# this app
+from autoslug import utils
+from autoslug.fields import AutoSlugField
+
+
+def get_model(label):
+    try:
+        return apps.get_model(label)
+    except (LookupError, ValueError) as e:
+        raise CommandError('Unknown model "%s": %s' % (label, e))
+
+
+def get_slug_field(model, name=None):
+    """
+    Returns the `AutoSlugField` of given model with given name. The name may be
+    omitted if the model has only one such field.
+    """
+    fields = [f for f in model._meta.concrete_fields if isinstance(f, AutoSlugField)]
+    if name is not None:
+        fields = [f for f in fields if f.name == name]
+    if len(fields) != 1:
+        raise CommandError('Please specify one of the AutoSlugField fields of %s: %s'
+                           % (model._meta.label,
+                              ', '.join(f.name for f in fields) or '(none found)'))
+    return fields[0]
+
+
+def get_loaded_fields(field, with_slug=False):
+    """
+    Returns the names of concrete fields needed to regenerate the slug or
+    `None` if the whole rows must be loaded (e.g. `populate_from` is callable).
+    The current slug is included if `with_slug` is True.
+    """
+    opts = field.model._meta
+    names = {opts.pk.attname}
+    if with_slug:
+        names.add(field.attname)
+
+    if field.populate_from:
+        if callable(field.populate_from):
+            return None
+        try:
+            names.add(opts.get_field(field.populate_from).attname)
+        except FieldDoesNotExist:
+            # a method or a property may depend on anything
+            return None
+    else:
+        names.add(field.attname)
+
+    try:
+        plan = field.get_uniqueness_plan()
+    except ValueError:
+        # let get_uniqueness_lookups() complain about it
+        return None
+    names.update(lookup.field.attname for lookup in plan)
+
+    return sorted(names)
+
+
+def get_scope_keys(field):
+    """
+    Returns `values()` keys which partition the rows of the model by the
+    ``unique_with`` scope of given field.
+    """
+    keys = []
+    for lookup in field.get_uniqueness_plan():
+        if lookup.date_parts:
+            keys.extend('%s__%s' % (lookup.name, part) for part in lookup.date_parts)
+        else:
+            keys.append(lookup.lookup)
+    return keys
+
+
+def get_scopes(field, queryset):
+    """
+    Returns the list of distinct scopes (as filter kwargs) of rows in given
+    queryset.
+    """
+    keys = get_scope_keys(field)
+    values = queryset.order_by().values_list(*keys).distinct()
+    return [dict(zip(keys, scope)) for scope in values]
+
+
+def get_rebuild_queryset(field, resume_from=None, with_slug=False):
+    """
+    Returns the queryset of rows to rebuild in primary key order.
+    """
+    queryset = field.model._base_manager.order_by('pk')
+    names = get_loaded_fields(field, with_slug)
+    if names is not None:
+        queryset = queryset.only(*names)
+    if resume_from is not None:
+        queryset = queryset.filter(pk__gt=resume_from)
+    return queryset
+
+
+def iter_chunks(queryset, chunk_size):
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def rebuild_chunk(field, chunk):
+    """
+    Regenerates and saves the slugs of given instances.
+    """
+    with transaction.atomic(using=field.model._base_manager.db):
+        field.populate_bulk(chunk, regenerate=True)
+        field.model._base_manager.bulk_update(chunk, [field.name])
+
+
+def rebuild_scope(label, field_name, scope, chunk_size, resume_from=None):
+    """
+    Rebuilds the slugs of rows within given scope. Runs in a worker process.
+
+    Returns the worker's pid, the number of rows and the time spent.
+    """
+    started = time.perf_counter()
+    field = get_slug_field(get_model(label), field_name)
+    queryset = get_rebuild_queryset(field, resume_from).filter(**scope)
+    count = 0
+    for chunk in iter_chunks(queryset, chunk_size):
+        rebuild_chunk(field, chunk)
+        count += len(chunk)
+    return os.getpid(), count, time.perf_counter() - started
+
+
+def slugify_chunk(label, field_name, values):
+    """
+    Slugifies given `(value, model_name)` pairs. Runs in a worker process and
+    does not touch the database.
+
+    Returns the worker's pid, the list of slugs and the time spent.
+    """
+    started = time.perf_counter()
+    field = get_slug_field(get_model(label), field_name)
+    slugs = [field.make_slug(value, model_name) for value, model_name in values]
+    return os.getpid(), slugs, time.perf_counter() - started
+
+
+class TakenSlugs:
+    """
+    The slugs a rebuilt row must not get: the new slugs of the rows processed
+    so far and the old slugs of all other rows.
+
+    The next index worth trying is kept for each original slug, so a family is
+    not searched from the start for every row. Freeing an old slug moves the
+    index of its family back.
+    """
+    def __init__(self, field, old_slugs):
+        self.field = field
+        self.new = set()
+        self.old = collections.Counter(old_slugs)
+        self.starts = {}
+
+    def __contains__(self, slug):
+        return slug in self.new or self.old[slug] > 0
+
+    def free(self, old_slug):
+        """
+        Forgets the old slug of a row about to be rebuilt.
+        """
+        self.old[old_slug] -= 1
+        if not old_slug or old_slug in self:
+            return
+        self.starts.pop(old_slug, None)
+        stem, sep, index = old_slug.rpartition(self.field.index_sep)
+        if not (sep and index.isdigit()):
+            return
+        index = int(index)
+        if len(old_slug) < self.field.max_length:
+            bases = [stem]
+        else:
+            # the stem may have been cropped to make room for the index
+            bases = [base for base in self.starts if base.startswith(stem)]
+        for base in bases:
+            if self.starts.get(base, 1) > index:
+                self.starts[base] = index
+
+    def take(self, original_slug):
+        """
+        Returns the first free candidate for given original slug and marks it
+        as taken.
+        """
+        index = utils.find_free_index(self.field, original_slug, self,
+                                      self.starts.get(original_slug, 1))
+        self.starts[original_slug] = index + 1
+        slug = utils.get_indexed_slug(self.field, original_slug, index)
+        self.new.add(slug)
+        return slug
+
+
+def imap_ahead(executor, fn, tasks, ahead):
+    """
+    Like `executor.map()` but `tasks` (pairs of an arbitrary item and the
+    arguments for `fn`) are consumed lazily: at most `ahead` of them are
+    submitted in advance. Yields `(item, result)` pairs in order.
+    """
+    pending = collections.deque()
+    for item, args in tasks:
+        pending.append((item, executor.submit(fn, *args)))
+        if len(pending) >= ahead:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def rebuild_partitioned(field, executor, workers, chunk_size, resume_from=None):
+    """
+    Rebuilds the slugs of a field with `unique_with`, one scope per task.
+
+    Scopes with empty values (which may clash with other scopes, see
+    :func:`~autoslug.utils.get_uniqueness_lookups`) are rebuilt afterwards
+    in the main process. Yields `(pid, rows, seconds)` for each task.
+    """
+    label = field.model._meta.label
+    scopes = get_scopes(field, get_rebuild_queryset(field, resume_from))
+    isolated = [scope for scope in scopes if None not in scope.values()]
+    leftovers = [scope for scope in scopes if None in scope.values()]
+
+    tasks = (((), (label, field.name, scope, chunk_size, resume_from))
+             for scope in isolated)
+    for _, stats in imap_ahead(executor, rebuild_scope, tasks, workers * 2):
+        yield stats
+
+    for scope in leftovers:
+        yield rebuild_scope(label, field.name, scope, chunk_size, resume_from)
+
+
+def rebuild_shared_nothing(field, executor, workers, chunk_size, resume_from=None):
+    """
+    Rebuilds the slugs of a field without `unique_with`: workers slugify the
+    values, the clashes are resolved here in primary key order (as if the rows
+    were saved one by one) and the slugs are written in chunks.
+
+    Yields `(pid, rows, seconds)` for each chunk.
+    """
+    label = field.model._meta.label
+    manager = field.model._base_manager
+    # the old slugs tell which ones are about to be freed
+    queryset = get_rebuild_queryset(field, resume_from, with_slug=field.unique)
+
+    taken = None
+    if field.unique:
+        taken = TakenSlugs(field, manager.values_list(field.attname, flat=True).iterator())
+
+    def tasks():
+        for chunk in iter_chunks(queryset, chunk_size):
+            values = [(field.get_slug_source(instance, regenerate=True),
+                       instance._meta.model_name) for instance in chunk]
+            yield chunk, (label, field.name, values)
+
+    for chunk, (pid, slugs, seconds) in imap_ahead(executor, slugify_chunk, tasks(), workers * 2):
+        for instance, slug in zip(chunk, slugs):
+            if taken is not None:
+                # the row does not clash with itself (as if it were saved)
+                taken.free(field.value_from_object(instance))
+                if slug:
+                    slug = taken.take(utils.crop_slug(field, slug))
+            setattr(instance, field.name, slug)
+        with transaction.atomic(using=manager.db):
+            manager.bulk_update(chunk, [field.name])
+        yield pid, len(chunk), seconds
+
+
+def _init_worker():
+    if not apps.ready:    # pragma: nocover
+        # spawned rather than forked
+        django.setup()
+
+
+def create_executor(workers):
+    try:
+        context = multiprocessing.get_context('fork')
+    except ValueError:    # pragma: nocover
+        context = None
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, mp_context=context, initializer=_init_worker)
+
+
+class Command(BaseCommand):
+    help = 'Regenerates the slugs of all rows of a model.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='the model as "app_label.ModelName"')
+        parser.add_argument('--field', help='name of the AutoSlugField'
+                            ' (may be omitted if the model has only one)')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='number of rows loaded and updated at once')
+        parser.add_argument('--resume-from', metavar='PK',
+                            help='skip rows with primary keys up to this one')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='number of worker processes')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive number')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be a positive number')
+
+        model = get_model(options['model'])
+        field = get_slug_field(model, options['field'])
+
+        if options['workers'] > 1:
+            total = self.rebuild_parallel(field, options['workers'],
+                                          options['chunk_size'], options['resume_from'])
+        else:
+            total = self.rebuild(field, options['chunk_size'], options['resume_from'])
+
+        self.stdout.write('Done: rebuilt %d %s.%s slugs.'
+                          % (total, model._meta.label, field.name))
+
+    def rebuild(self, field, chunk_size, resume_from=None):
+        queryset = get_rebuild_queryset(field, resume_from)
+        total = 0
+        for chunk in iter_chunks(queryset, chunk_size):
+            rebuild_chunk(field, chunk)
+            total += len(chunk)
+            self.stdout.write('Rebuilt %d rows, last pk: %s' % (total, chunk[-1].pk))
+        return total
+
+    def rebuild_parallel(self, field, workers, chunk_size, resume_from=None, executor=None):
+        if field.unique_condition is not None and not field.unique_with:
+            # which old slugs are taken depends on the condition rather than
+            # on a scope, so the rows can't be split between the workers
+            return self.rebuild(field, chunk_size, resume_from)
+
+        if executor is None:
+            if field.unique_with:
+                # forked workers must not share the connections of this process
+                connections.close_all()
+            with create_executor(workers) as executor:
+                return self.rebuild_parallel(field, workers, chunk_size,
+                                             resume_from, executor)
+
+        rebuild = rebuild_partitioned if field.unique_with else rebuild_shared_nothing
+
+        rows = collections.Counter()
+        seconds = collections.Counter()
+        for pid, count, elapsed in rebuild(field, executor, workers, chunk_size, resume_from):
+            rows[pid] += count
+            seconds[pid] += elapsed
+
+        for pid in sorted(rows):
+            rate = rows[pid] / seconds[pid] if seconds[pid] else 0
+            self.stdout.write('Worker %s: %d rows, %.1f rows/sec' % (pid, rows[pid], rate))
+        return sum(rows.values())
@@ -0,0 +1,209 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Prints the statistics of slug generation collected with the
+`AUTOSLUG_COLLECT_STATS` setting (see :mod:`autoslug.stats`)::
+
+    python manage.py autoslug_stats [--json]
+
+The statistics are kept in the memory of each process, so this is mostly
+useful with `call_command()` from a long-running one (e.g. from a shell, a
+periodic task or a debug view).
+
+Given a model, the command scans its table instead and estimates the cost of
+collisions for new rows::
+
+    python manage.py autoslug_stats blog.Article --field slug
+
+The existing slugs are grouped by their uniqueness scope and base slug ("foo",
+"foo-2" and "foo-3" form the family of "foo"). The report shows how densely
+the families are packed and how many queries each collision strategy would
+need to find a free slug for a new row, on average (assuming new rows get base
+slugs as often as the existing ones did) and at most. Strategies needing many
+queries suggest switching to another one or to an allocator (see
+:mod:`autoslug.allocators`).
+"""
+import collections
+import heapq
+import json
+
+# django
+from django.core.management.base import BaseCommand, CommandError
+
+# this app
+from autoslug import stats, utils
+from autoslug.management.commands.autoslug_rebuild import get_model, get_slug_field
+
+
+def get_families(field, slugs):
+    """
+    Returns a dict mapping the base slugs among given slugs of one scope to the
+    sizes of their families: "foo-<n>" belongs to the family of "foo" if "foo"
+    is among the slugs too.
+    """
+    families = collections.Counter()
+    for slug in slugs:
+        stem, sep, index = slug.rpartition(field.index_sep)
+        if sep and index.isdigit() and stem in slugs:
+            families[stem] += 1
+        else:
+            families[slug] += 1
+    return families
+
+
+def scan_field(field, chunk_size=1000, top=10):
+    """
+    Scans the existing slugs of given field (of the rows matching its
+    `unique_condition`, if any) and returns a dict with the numbers of rows,
+    scopes, families, families with more than one slug and rows in them; the
+    `top` largest families as `(base slug, size, next index)` triples; and for
+    each collision strategy the mean and maximum number of queries needed to
+    add a slug to a family (see :func:`~autoslug.stats.get_probe_queries`).
+    """
+    opts = field.model._meta
+    names = {opts.pk.attname, field.attname}
+    names.update(lookup.field.attname for lookup in field.get_uniqueness_plan())
+    queryset = field.model._base_manager.only(*names).order_by()
+    if field.unique_condition is not None:
+        queryset = queryset.filter(field.unique_condition)
+
+    scopes = collections.defaultdict(set)
+    for instance in queryset.iterator(chunk_size=chunk_size):
+        slug = field.value_from_object(instance)
+        if slug:
+            lookups = tuple(utils.get_uniqueness_lookups(field, instance))
+            scopes[utils.get_scope_key(lookups)].add(slug)
+
+    result = dict(rows=0, scopes=len(scopes), families=0, clashing_families=0,
+                  clashing_rows=0)
+    totals = dict.fromkeys(utils.COLLISION_STRATEGIES, 0)
+    maxima = dict.fromkeys(utils.COLLISION_STRATEGIES, 0)
+    largest = []
+    for slugs in scopes.values():
+        for base, size in get_families(field, slugs).items():
+            result['rows'] += size
+            result['families'] += 1
+            if size > 1:
+                result['clashing_families'] += 1
+                result['clashing_rows'] += size
+            index = utils.find_free_index(field, base, slugs)
+            for strategy in totals:
+                queries = stats.get_probe_queries(field, index, strategy)
+                totals[strategy] += queries * size
+                maxima[strategy] = max(maxima[strategy], queries)
+            entry = (size, base, index)
+            if len(largest) < top:
+                heapq.heappush(largest, entry)
+            elif top:
+                heapq.heappushpop(largest, entry)
+
+    result['largest'] = [(base, size, index) for size, base, index
+                         in sorted(largest, reverse=True)]
+    result['probe_queries'] = {
+        strategy: (totals[strategy] / result['rows'] if result['rows'] else 0,
+                   maxima[strategy])
+        for strategy in totals}
+    return result
+
+
+def format_buckets(buckets):
+    return ', '.join('%s: %d' % (low if low == high else '%d-%d' % (low, high), count)
+                     for low, high, count in buckets)
+
+
+def format_percent(part, whole):
+    return '%.1f%%' % (100 * part / whole) if whole else '-'
+
+
+class Command(BaseCommand):
+    help = ('Prints the statistics of slug generation collected in this process'
+            ' or estimates the cost of collisions from the rows of a model.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', nargs='?',
+                            help='the model to scan as "app_label.ModelName"')
+        parser.add_argument('--field', help='name of the AutoSlugField'
+                            ' (may be omitted if the model has only one)')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='number of rows loaded at once')
+        parser.add_argument('--top', type=int, default=10,
+                            help='number of largest slug families to show')
+        parser.add_argument('--json', action='store_true',
+                            help='print the data as JSON')
+
+    def handle(self, *args, **options):
+        if options['model'] is None:
+            data = stats.registry.info()
+            if options['json']:
+                self.stdout.write(json.dumps(data, indent=2))
+            else:
+                self.print_registry(data)
+            return
+
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive number')
+        if options['top'] < 0:
+            raise CommandError('--top must not be negative')
+
+        field = get_slug_field(get_model(options['model']), options['field'])
+        if not field.requires_unique_slug():
+            raise CommandError('%s.%s is not unique, its slugs never clash'
+                               % (field.model._meta.label, field.name))
+
+        data = scan_field(field, options['chunk_size'], options['top'])
+        if options['json']:
+            self.stdout.write(json.dumps(data, indent=2))
+        else:
+            self.print_scan(field, data)
+
+    def print_registry(self, data):
+        if not data:
+            self.stdout.write('No statistics collected (see AUTOSLUG_COLLECT_STATS).')
+            return
+        for key, info in data.items():
+            self.stdout.write('%s: %d slugs, %d collisions (%s), %d kept' % (
+                key, info['slugs'], info['collisions'],
+                format_percent(info['collisions'], info['slugs']), info['kept']))
+            for name, title in (('candidates', 'candidates'), ('queries', 'queries'),
+                                ('slugify_time', 'slugify time (us)'),
+                                ('db_time', 'db time (us)')):
+                histogram = info[name]
+                if histogram['mean'] is None:
+                    continue
+                self.stdout.write('  %s: mean %.1f, max %s [%s]' % (
+                    title, histogram['mean'], histogram['max'],
+                    format_buckets(histogram['buckets'])))
+            if info['top_collisions']:
+                self.stdout.write('  top collisions: %s' % ', '.join(
+                    '%s (%d)' % item for item in info['top_collisions']))
+
+    def print_scan(self, field, data):
+        self.stdout.write('%s.%s: %d rows in %d scopes, %d base slugs' % (
+            field.model._meta.label, field.name, data['rows'], data['scopes'],
+            data['families']))
+        self.stdout.write('  base slugs with clashes: %d (%d rows, %s)' % (
+            data['clashing_families'], data['clashing_rows'],
+            format_percent(data['clashing_rows'], data['rows'])))
+        if data['families']:
+            self.stdout.write('  rows per base slug: %.2f'
+                              % (data['rows'] / data['families']))
+        if data['largest']:
+            self.stdout.write('  largest families:')
+            for base, size, index in data['largest']:
+                self.stdout.write('    %s: %d slugs, next index %d' % (base, size, index))
+
+        self.stdout.write('  projected queries per new slug (mean / max):')
+        current = field.collision_strategy
+        for strategy, (mean, maximum) in data['probe_queries'].items():
+            self.stdout.write('  %s %s: %.1f / %d' % (
+                '*' if strategy == current else ' ', strategy, mean, maximum))
+        if field.get_allocator() is not None:
+            self.stdout.write('  (the field uses an allocator: one query per slug'
+                              ' once its counters are seeded)')
@@ -32,6 +32,15 @@ Django settings that affect django-autoslug:
   * `pytils.translit.slugify()` if pytils_ is available;
   * `django.template.defaultfilters.slugify()` bundled with Django.
 
+  django-autoslug also ships a faster implementation of the default function
+  (it requires Unidecode_ and gives exactly the same results)::
+
+     AUTOSLUG_SLUGIFY_FUNCTION = 'autoslug.utils.fast_slugify'
+
+  A slugify function that has the attribute ``accepts_max_length`` set to
+  `True` is called with the `max_length` keyword argument and is expected to
+  crop the slug itself.
+
   django-autoslug also ships a couple of slugify functions that use
   the translitcodec_ Python library, e.g.::
 
@@ -44,17 +53,57 @@ Django settings that affect django-autoslug:
      # only performing single character replacements
      AUTOSLUG_SLUGIFY_FUNCTION = 'autoslug.utils.translit_one'
 
+  Large numbers of values can be slugified with
+  ``autoslug.utils.slugify_many()`` (optionally in a process pool), or with
+  ``translit_long_many()``, ``translit_short_many()`` and
+  ``translit_one_many()`` for the functions above.
+
 .. _Unidecode: http://pypi.python.org/pypi/Unidecode
 .. _pytils: http://pypi.python.org/pypi/pytils
 .. _translitcodec: http://pypi.python.org/pypi/translitcodec
 
+`AUTOSLUG_SLUGIFY_CACHE_SIZE`
+  If set to a positive number, the results of slugify functions are kept in
+  a thread-safe LRU cache of up to this many entries, which saves time when
+  the same values are slugified again and again. The numbers of hits, misses
+  and evictions are available from ``autoslug.utils.slugify_cache.info()``.
+  Default is `None` (no caching).
+
 `AUTOSLUG_MODELTRANSLATION_ENABLE`
   Django-autoslug support of modeltranslation_ is still experimental.
   If you wish to enable it, please set this option to `True` in your project
   settings.  Default is `False`.
 
+  If both the slug field and its `populate_from` field are registered for
+  translation, each localized slug (e.g. ``slug_en``) is filled from the
+  localized source (``title_en``) and saved along with the rest of the row.
+  Unique slugs are made unique within their own column.
+
 .. _modeltranslation: http://django-modeltranslation.readthedocs.org
 
+`AUTOSLUG_ALLOCATOR`
+  The default allocator of slug indices for all fields, e.g.::
+
+      # counters in a database table (requires the autoslug.counters app)
+      AUTOSLUG_ALLOCATOR = 'autoslug.allocators.CounterAllocator'
+
+      # counters in a cache shared by all nodes
+      AUTOSLUG_ALLOCATOR = 'autoslug.allocators.CacheAllocator'
+
+  See :mod:`autoslug.allocators`. Default is `None`, i.e. clashes are resolved
+  by the `collision_strategy` of the field.
+
+`AUTOSLUG_ALLOCATOR_CACHE`
+  Alias of the cache used by :class:`~autoslug.allocators.CacheAllocator`.
+  Default is ``'default'``.
+
+`AUTOSLUG_COLLECT_STATS`
+  If set to `True`, the statistics of slug generation (probe depth, slugify
+  latency, collision rate and the base slugs that clash most often) are
+  collected in the current process, see :mod:`autoslug.stats` and the
+  ``autoslug_stats`` command. Measuring the costs takes a little time on
+  every save. Default is `False`.
+
 """
 from django.conf import settings
 from django import VERSION
@@ -65,5 +114,17 @@ from django.urls import get_callable
 slugify_function_path = getattr(settings, 'AUTOSLUG_SLUGIFY_FUNCTION', 'autoslug.utils.slugify')
 slugify = get_callable(slugify_function_path)
 
+# memoize slugify functions
+slugify_cache_size = getattr(settings, 'AUTOSLUG_SLUGIFY_CACHE_SIZE', None)
+
 # enable/disable modeltranslation support
 autoslug_modeltranslation_enable = getattr(settings, 'AUTOSLUG_MODELTRANSLATION_ENABLE', False)
+
+# default allocator of slug indices
+allocator = getattr(settings, 'AUTOSLUG_ALLOCATOR', None)
+
+# cache used by autoslug.allocators.CacheAllocator
+allocator_cache = getattr(settings, 'AUTOSLUG_ALLOCATOR_CACHE', 'default')
+
+# collect statistics in autoslug.stats.registry
+collect_stats = getattr(settings, 'AUTOSLUG_COLLECT_STATS', False)
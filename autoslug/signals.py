@@ -0,0 +1,55 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Signals sent by :class:`~autoslug.fields.AutoSlugField` to report how
+expensive the generation of slugs is, e.g. to feed them into metrics::
+
+    from django.dispatch import receiver
+    from autoslug.signals import slug_generated
+
+    @receiver(slug_generated)
+    def report_slug(sender, field, candidates, queries, db_time, **kwargs):
+        metrics.histogram('slug.candidates', candidates, tags=[sender._meta.label])
+        metrics.timing('slug.db_time', db_time, tags=[sender._meta.label])
+
+The costs are only measured if there is a receiver for the model, so the
+signals cost (next to) nothing otherwise. The sender is the model class.
+"""
+from django.dispatch import Signal
+
+__all__ = ['slug_generated', 'slugs_generated']
+
+
+#: Sent at the end of `AutoSlugField.pre_save()` with these arguments:
+#:
+#: * `field` and `instance`;
+#: * `base`: the slugified value before making it unique, or `None` if the
+#:   slug was kept (see :meth:`~autoslug.fields.AutoSlugField.get_unchanged_slug`)
+#:   or resolved in advance (e.g. together with other fields);
+#: * `slug`: the final slug;
+#: * `candidates`: the index of the slug within the family of the base slug
+#:   (1 if the base slug was free), i.e. the number of candidates a linear
+#:   probe tries, or `None` without a base slug;
+#: * `queries` and `db_time`: the number of queries issued by the field (to
+#:   the database of its manager) and the seconds spent on them;
+#: * `slugify_time`: the seconds spent on computing the base slug.
+#:
+#: It is not sent if the slug is deferred and there is nothing to do. With the
+#: ``'optimistic'`` collision strategy it is sent once more if the database has
+#: rejected the slug and the row is saved again (the first time with the base
+#: slug, no queries and `candidates` of 1).
+slug_generated = Signal(use_caching=True)
+
+#: Sent at the end of `AutoSlugField.populate_bulk()` (which is also used by
+#: :func:`~autoslug.fields.bulk_create` and the ``autoslug_rebuild`` command)
+#: with these arguments: `field`, `instances`, and the lists `bases`, `slugs`
+#: and `candidates` in the same order; `queries`, `db_time` and `slugify_time`
+#: for the whole batch (see :data:`slug_generated`).
+slugs_generated = Signal(use_caching=True)
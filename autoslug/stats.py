@@ -0,0 +1,227 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Statistics of slug generation collected in the current process if the
+`AUTOSLUG_COLLECT_STATS` setting is enabled (see :mod:`autoslug.settings`).
+
+The :data:`registry` receives the :mod:`autoslug.signals` and keeps for every
+field the histograms of probe depth (the index of the generated slug within
+its family, see :func:`~autoslug.utils.get_slug_index`), slugify latency and
+database time, the collision rate and the base slugs that clash most often.
+The memory it takes does not grow with the number of slugs::
+
+    >>> from autoslug.stats import registry
+    >>> registry.info()['blog.Article.slug']['collision_rate']
+    0.25
+
+The ``autoslug_stats`` management command prints the same data and can also
+estimate the cost of collisions from the existing rows of a table.
+"""
+import threading
+
+# this app
+from autoslug import signals, utils
+
+
+__all__ = ['registry', 'SlugStats', 'get_probe_queries']
+
+
+class Histogram:
+    """
+    Counts non-negative integers in buckets growing by powers of two: 0, 1,
+    2-3, 4-7, etc.
+    """
+    def __init__(self):
+        self.counts = {}
+        self.total = self.max = 0
+        self.count = 0
+
+    def add(self, value, count=1):
+        bucket = int(value).bit_length()
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += count
+        self.total += value * count
+        self.max = max(self.max, value)
+
+    def info(self):
+        """
+        Returns a dict with the mean and maximum value, and the list of
+        `(lowest value, highest value, count)` triples of non-empty buckets.
+        """
+        buckets = [(1 << bucket >> 1, (1 << bucket) - 1, self.counts[bucket])
+                   for bucket in sorted(self.counts)]
+        mean = self.total / self.count if self.count else None
+        return dict(mean=mean, max=self.max, buckets=buckets)
+
+
+class TopCounter:
+    """
+    Keeps approximate counts of the most frequent keys in bounded memory (the
+    "space saving" algorithm): when full, the least frequent key is replaced
+    and the new one inherits its count, so counts may be overestimated by at
+    most the count of the evicted key.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.counts = {}
+
+    def add(self, key):
+        if key in self.counts or len(self.counts) < self.size:
+            self.counts[key] = self.counts.get(key, 0) + 1
+        else:
+            evicted = min(self.counts, key=self.counts.get)
+            self.counts[key] = self.counts.pop(evicted) + 1
+
+    def most_common(self):
+        return sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+class FieldStats:
+    """
+    Statistics of one `AutoSlugField`.
+    """
+    def __init__(self, top_size):
+        self.slugs = self.collisions = self.kept = 0
+        self.candidates = Histogram()
+        self.slugify_time = Histogram()    # microseconds
+        self.db_time = Histogram()         # microseconds
+        self.queries = Histogram()
+        self.top_collisions = TopCounter(top_size)
+
+    def add(self, base, candidates):
+        if candidates is None:
+            # the slug was kept or resolved without a base
+            self.kept += 1
+            return
+        self.slugs += 1
+        self.candidates.add(candidates)
+        if candidates > 1:
+            self.collisions += 1
+            self.top_collisions.add(base)
+
+    def info(self):
+        return dict(
+            slugs=self.slugs,
+            kept=self.kept,
+            collisions=self.collisions,
+            collision_rate=self.collisions / self.slugs if self.slugs else None,
+            candidates=self.candidates.info(),
+            queries=self.queries.info(),
+            slugify_time=self.slugify_time.info(),
+            db_time=self.db_time.info(),
+            top_collisions=self.top_collisions.most_common(),
+        )
+
+
+class SlugStats:
+    """
+    A thread-safe registry of :class:`FieldStats` keyed by
+    ``"app_label.ModelName.field_name"``. Keeps up to `top_size` of the base
+    slugs that clash most often for each field.
+    """
+    def __init__(self, top_size=20):
+        self.top_size = top_size
+        self._fields = {}
+        self._lock = threading.Lock()
+
+    def get_field_stats(self, sender, field):
+        key = '%s.%s' % (sender._meta.label, field.name)
+        stats = self._fields.get(key)
+        if stats is None:
+            stats = self._fields.setdefault(key, FieldStats(self.top_size))
+        return stats
+
+    def receive(self, sender, field, base, candidates, queries, slugify_time, db_time,
+                **kwargs):
+        """
+        Receiver of :data:`~autoslug.signals.slug_generated`.
+        """
+        with self._lock:
+            stats = self.get_field_stats(sender, field)
+            stats.add(base, candidates)
+            stats.queries.add(queries)
+            stats.slugify_time.add(round(slugify_time * 1e6))
+            stats.db_time.add(round(db_time * 1e6))
+
+    def receive_bulk(self, sender, field, bases, candidates, queries, slugify_time, db_time,
+                     **kwargs):
+        """
+        Receiver of :data:`~autoslug.signals.slugs_generated`. The queries and
+        times of the batch are spread evenly over its slugs.
+        """
+        count = len(bases)
+        if not count:
+            return
+        with self._lock:
+            stats = self.get_field_stats(sender, field)
+            for base, index in zip(bases, candidates):
+                stats.add(base, index)
+            stats.queries.add(queries / count, count)
+            stats.slugify_time.add(round(slugify_time * 1e6 / count), count)
+            stats.db_time.add(round(db_time * 1e6 / count), count)
+
+    def connect(self):
+        signals.slug_generated.connect(self.receive, weak=False,
+                                       dispatch_uid=('autoslug.stats', id(self)))
+        signals.slugs_generated.connect(self.receive_bulk, weak=False,
+                                        dispatch_uid=('autoslug.stats', id(self)))
+
+    def disconnect(self):
+        signals.slug_generated.disconnect(dispatch_uid=('autoslug.stats', id(self)))
+        signals.slugs_generated.disconnect(dispatch_uid=('autoslug.stats', id(self)))
+
+    def info(self):
+        """
+        Returns a dict mapping field keys to dicts with the numbers of
+        generated slugs, kept slugs (see
+        :meth:`~autoslug.fields.AutoSlugField.get_unchanged_slug`) and
+        collisions, the collision rate, the histograms of candidates, queries,
+        slugify time and database time (in microseconds, see
+        :meth:`Histogram.info`) and the list of `(base slug, collisions)` pairs.
+        """
+        with self._lock:
+            return {key: stats.info() for key, stats in sorted(self._fields.items())}
+
+    def clear(self):
+        with self._lock:
+            self._fields.clear()
+
+
+#: The registry fed by all fields if `AUTOSLUG_COLLECT_STATS` is enabled.
+registry = SlugStats()
+
+
+def get_probe_queries(field, index, strategy=None):
+    """
+    Returns the number of queries needed to find the slug with given index
+    within its family (see :func:`~autoslug.utils.get_slug_index`) with given
+    collision strategy (by default the one of the field).
+    """
+    strategy = strategy or field.collision_strategy
+    if strategy == 'linear':
+        return index
+    if strategy == 'windowed':
+        queries, start, size = 1, 1, field.window_size
+        while index >= start + size:
+            start += size
+            size = utils.get_next_window_size(field, size)
+            queries += 1
+        return queries
+    if strategy == 'optimistic' and index == 1:
+        # the slug is just inserted
+        return 0
+    queries, digits = 1, utils.SINGLE_QUERY_DIGITS
+    while index >= 10 ** digits:
+        digits += 1
+        queries += 1
+    if strategy == 'optimistic':
+        # the insert is rejected first
+        queries += 1
+    return queries
@@ -8,7 +8,7 @@
 #  Software Foundation. See the file README for copying conditions.
 #
 from django.db.models import (
-    Model, CharField, DateField, DateTimeField, BooleanField, ForeignKey, Manager, CASCADE
+    Model, CharField, DateField, DateTimeField, BooleanField, ForeignKey, Manager, Q, CASCADE
 )
 
 # this app
@@ -62,6 +62,100 @@ class ModelWithLongNameUnique(Model):
     slug = AutoSlugField(populate_from='name', unique=True)
 
 
+class ModelWithSingleQueryStrategy(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True,
+                         collision_strategy='single_query')
+
+
+class ModelWithSingleQueryStrategyMonth(Model):
+    date = DateField()
+    slug = AutoSlugField(unique_with='date__month', collision_strategy='single_query')
+
+
+class ModelWithLongNameSingleQuery(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True, max_length=10,
+                         collision_strategy='single_query')
+
+
+class ModelWithWindowedStrategy(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True, collision_strategy='windowed',
+                         window_size=4, window_growth=2)
+
+
+class ModelWithOptimisticStrategy(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True, collision_strategy='optimistic')
+
+
+class ModelWithOptimisticStrategyFK(Model):
+    name = CharField(max_length=200)
+    simple_model = ForeignKey(SimpleModel, null=True, blank=True, on_delete=CASCADE)
+    slug = AutoSlugField(populate_from='name', unique_with='simple_model',
+                         collision_strategy='optimistic')
+
+
+class ModelWithOptimisticStrategyMonth(Model):
+    date = DateField()
+    slug = AutoSlugField(unique_with='date__month', collision_strategy='optimistic')
+
+
+class ModelWithScopeIndex(Model):
+    date = DateField()
+    simple_model = ForeignKey(SimpleModel, on_delete=CASCADE)
+    slug = AutoSlugField(unique_with=('date__month', 'simple_model'), scope_index=True)
+
+
+class ModelWithUniqueCondition(Model):
+    name = CharField(max_length=200)
+    is_archived = BooleanField(default=False)
+    slug = AutoSlugField(populate_from='name', unique=True,
+                         unique_condition=Q(is_archived=False))
+
+
+class ModelWithUniqueConditionFK(Model):
+    name = CharField(max_length=200)
+    is_archived = BooleanField(default=False)
+    simple_model = ForeignKey(SimpleModel, on_delete=CASCADE)
+    slug = AutoSlugField(populate_from='name', unique_with='simple_model',
+                         unique_condition=Q(is_archived=False), scope_index=True)
+
+
+class ModelWithSeveralSlugs(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True)
+    handle = AutoSlugField(populate_from='name', unique=True, sep='_')
+    code = AutoSlugField(populate_from='name', unique=True, max_length=5)
+
+
+class ModelWithSeveralSlugsDate(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True)
+    date = DateField(auto_now_add=True)
+    date_slug = AutoSlugField(populate_from='name', unique_with='date')
+
+
+class ModelWithCounterAllocator(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True,
+                         allocator='autoslug.allocators.CounterAllocator')
+
+
+class ModelWithCounterAllocatorFK(Model):
+    name = CharField(max_length=200)
+    simple_model = ForeignKey(SimpleModel, on_delete=CASCADE)
+    slug = AutoSlugField(populate_from='name', unique_with='simple_model',
+                         allocator='autoslug.allocators.CounterAllocator')
+
+
+class ModelWithCacheAllocator(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True,
+                         allocator='autoslug.allocators.CacheAllocator')
+
+
 class ModelWithCallable(Model):
     name = CharField(max_length=200)
     slug = AutoSlugField(populate_from=lambda instance: 'the %s' % instance.name)
@@ -136,6 +230,11 @@ class ModelWithAutoUpdateEnabled(Model):
     slug = AutoSlugField(populate_from='name', always_update=True)
 
 
+class ModelWithUniqueAutoUpdate(Model):
+    name = CharField(max_length=200)
+    slug = AutoSlugField(populate_from='name', unique=True, always_update=True)
+
+
 class ModelWithSlugSpaceSharedIntegrityError(ModelWithUniqueSlug):
     pass
 
@@ -164,6 +263,11 @@ class ModeltranslationOne(Model):
     slug = AutoSlugField(populate_from='title', always_update=True, unique=True)
 
 
+class ModeltranslationTwo(Model):
+    title = CharField(max_length=255)
+    slug = AutoSlugField(populate_from='title', unique=True)
+
+
 class NonDeletedObjects(Manager):
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
@@ -9,17 +9,39 @@
 #
 
 # python
+import concurrent.futures
 import datetime
+import io
+import json
+import multiprocessing
+import pickle
 import sys
+import threading
 import unittest
+from unittest import mock
 
 # django
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.state import ModelState, StateApps
+from django.db.models import Q
+from django.db.models.signals import post_init
 from django.test import TestCase
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import make_aware
 
 # this package
+from autoslug import bulk_create, utils
+from autoslug.allocators import CacheAllocator, CounterAllocator
+from autoslug.utils import CachedSlugify, SlugifyCache, cached_slugify, slugify_many
+from autoslug.utils import get_date_range
+from autoslug.counters.models import SlugCounter
+from autoslug.management.commands.autoslug_rebuild import Command
+from autoslug.signals import slug_generated, slugs_generated
+from autoslug.stats import SlugStats, get_probe_queries
 from .models import *
 
 
@@ -60,6 +82,108 @@ class AutoSlugFieldTestCase(TestCase):
         c.save()
         assert c.slug == 'hello-world-4'
 
+    def test_unique_slug_fk_not_fetched(self):
+        sm = SimpleModel.objects.create(name='test')
+        ModelWithUniqueSlugFK.objects.create(name='foo', simple_model=sm)
+        ModelWithUniqueSlugFKNull.objects.create(name='foo', simple_model=sm)
+        # the related object is not loaded: two rival queries and the insert
+        a = ModelWithUniqueSlugFK(name='foo', simple_model_id=sm.pk)
+        with self.assertNumQueries(3):
+            a.save()
+        assert a.slug == 'foo-2'
+        b = ModelWithUniqueSlugFKNull(name='foo', simple_model_id=sm.pk)
+        with self.assertNumQueries(3):
+            b.save()
+        assert b.slug == 'foo-2'
+
+    def test_unchanged_slug_not_checked(self):
+        for i in range(3):
+            ModelWithUniqueSlug.objects.create(slug='foo')
+        a = ModelWithUniqueSlug.objects.get(slug='foo-2')
+        with self.assertNumQueries(1):
+            a.save()
+        assert a.slug == 'foo-2'
+        # a changed slug is checked
+        a.slug = 'foo-3'
+        a.save()
+        assert a.slug == 'foo-3-2'
+        # the last saved slug is remembered
+        with self.assertNumQueries(1):
+            a.save()
+        # loading the instances does not copy anything
+        assert not post_init.has_listeners(ModelWithUniqueSlug)
+
+    def test_unchanged_slug_update_fields(self):
+        for i in range(2):
+            ModelWithUniqueSlug.objects.create(slug='foo')
+        a = ModelWithUniqueSlug.objects.get(slug='foo-2')
+        a.slug = 'foo'
+        # the slug is not saved, so it is still changed
+        a.save(update_fields=['name'])
+        a.save()
+        assert a.slug == 'foo-2'
+
+    def test_unchanged_slug_always_update(self):
+        ModelWithUniqueAutoUpdate.objects.create(name='foo')
+        ModelWithUniqueAutoUpdate.objects.create(name='foo')
+        a = ModelWithUniqueAutoUpdate.objects.get(slug='foo-2')
+        # "Foo!" is still "foo", so "foo-2" is kept
+        a.name = 'Foo!'
+        with self.assertNumQueries(1):
+            a.save()
+        assert a.slug == 'foo-2'
+        a.name = 'bar'
+        a.save()
+        assert a.slug == 'bar'
+
+    def test_deferred_fields_not_fetched(self):
+        ModelWithUniqueAutoUpdate.objects.create(name='foo')
+        ModelWithUniqueAutoUpdate.objects.create(name='foo')
+        # the source is not needed to keep the slug
+        a = ModelWithUniqueAutoUpdate.objects.only('id', 'slug').get(slug='foo-2')
+        with self.assertNumQueries(1):
+            a.save()
+        assert a.get_deferred_fields() == {'name'}
+        # neither is the slug if the source has not changed
+        a = ModelWithUniqueAutoUpdate.objects.only('id').get(slug='foo-2')
+        with self.assertNumQueries(1):
+            a.save(update_fields=['slug'])
+        assert a.get_deferred_fields() == {'name', 'slug'}
+        # the slug is regenerated from a changed source
+        a = ModelWithUniqueAutoUpdate.objects.only('id').get(slug='foo-2')
+        a.name = 'bar'
+        a.save(update_fields=['name', 'slug'])
+        assert a.slug == 'bar'
+
+    def test_unchanged_slug_scope_changed(self):
+        sm1 = SimpleModel.objects.create(name='test')
+        sm2 = SimpleModel.objects.create(name='test')
+        ModelWithUniqueSlugFKNull.objects.create(name='foo', simple_model=sm1)
+        ModelWithUniqueSlugFKNull.objects.create(name='foo', simple_model=sm2)
+        a = ModelWithUniqueSlugFKNull.objects.get(simple_model=sm2)
+        a.simple_model = sm1
+        a.save()
+        assert a.slug == 'foo-2'
+
+    def test_unchanged_slug_copy(self):
+        # saving a copy with the pk reset must not keep the slug
+        a = ModelWithUniqueSlug.objects.create(name='foo')
+        a.pk = None
+        a.save()
+        assert a.slug == 'foo-2'
+        b = ModelWithUniqueSlugDate.objects.create(date=datetime.date(2009, 9, 9), slug='foo')
+        b = ModelWithUniqueSlugDate.objects.get(pk=b.pk)
+        b.pk = None
+        b.save()
+        assert b.slug == 'foo-2'
+        assert ModelWithUniqueSlugDate.objects.filter(slug='foo').count() == 1
+        # nor a copy with a changed pk, created on the first save
+        c = ModelWithUniqueSlugDate.objects.create(date=datetime.date(2010, 1, 1), slug='bar')
+        c.pk = 12345
+        c.save()
+        assert c.slug == 'bar-2'
+        assert ModelWithUniqueSlugDate.objects.filter(slug='bar').count() == 1
+
     def test_unique_slug_fk_null(self):
         "See issue #13"
         sm1 = SimpleModel.objects.create(name='test')
@@ -133,6 +257,36 @@ class AutoSlugFieldTestCase(TestCase):
         assert b.slug == 'test-2'
         assert c.slug == 'test'
 
+    def test_unique_slug_month_range(self):
+        a = ModelWithUniqueSlugMonth.objects.create(slug='test', date=datetime.date(2009, 12, 31))
+        b = ModelWithUniqueSlugMonth(slug='test', date=datetime.date(2009, 12, 1))
+        with CaptureQueriesContext(connection) as queries:
+            b.save()
+        assert b.slug == 'test-2'
+        # the scope is a plain range, no date functions over the column
+        sql = queries[0]['sql']
+        assert '"date" >= \'2009-12-01\'' in sql
+        assert '"date" < \'2010-01-01\'' in sql
+        c = ModelWithUniqueSlugMonth.objects.create(slug='test', date=datetime.date(2010, 1, 1))
+        assert c.slug == 'test'
+
+    @override_settings(USE_TZ=True, TIME_ZONE='America/Los_Angeles')
+    def test_date_range_with_tz(self):
+        field = ModelWithUniqueSlugDay._meta.get_field('date')
+        value = datetime.datetime(2009, 9, 10, 1, tzinfo=datetime.timezone.utc)
+        start, end = get_date_range(field, value, 'day')
+        # 1 AM UTC is still the previous day in Los Angeles
+        assert start == make_aware(datetime.datetime(2009, 9, 9))
+        assert end == make_aware(datetime.datetime(2009, 9, 10))
+        assert start.utcoffset() == datetime.timedelta(hours=-7)
+
+    def test_date_range_bounds(self):
+        field = ModelWithUniqueSlugYear._meta.get_field('date')
+        assert get_date_range(field, datetime.date(9999, 3, 3), 'year') == (
+            datetime.date(9999, 1, 1), None)
+        assert get_date_range(field, datetime.date(2012, 2, 29), 'month') == (
+            datetime.date(2012, 2, 1), datetime.date(2012, 3, 1))
+
     def test_long_name(self):
         long_name = 'x' * 250
         a = ModelWithLongName(name=long_name)
@@ -149,6 +303,299 @@ class AutoSlugFieldTestCase(TestCase):
         assert b.slug[-3:] == 'x-2'    # uniqueness is forced
         assert len(b.slug) == 50        # slug is cropped
 
+    def test_single_query_strategy(self):
+        for x in range(3):
+            ModelWithSingleQueryStrategy.objects.create(name='Hello world!')
+        ModelWithSingleQueryStrategy.objects.create(name='Hello world again')
+        ModelWithSingleQueryStrategy.objects.filter(slug='hello-world-2').delete()
+        with self.assertNumQueries(1):
+            a = ModelWithSingleQueryStrategy(name='Hello world!')
+            a.slug = a._meta.get_field('slug').pre_save(a, True)
+        assert a.slug == 'hello-world-2'    # lowest free index is reused
+        a.save()
+        with self.assertNumQueries(2):
+            b = ModelWithSingleQueryStrategy.objects.create(name='Hello world!')
+        assert b.slug == 'hello-world-4'
+
+    def test_single_query_strategy_family(self):
+        # "foo-bar" and "foo-2x" share the prefix but are not in the family
+        for name in ('foo', 'foo bar', 'foo 2x', 'foo'):
+            ModelWithSingleQueryStrategy.objects.create(name=name)
+        field = ModelWithSingleQueryStrategy._meta.get_field('slug')
+        taken = utils.get_taken_slugs(field, ModelWithSingleQueryStrategy.objects.all(),
+                                      ['foo'], utils.SINGLE_QUERY_DIGITS)
+        assert taken == {'foo', 'foo-2'}
+        a = ModelWithSingleQueryStrategy.objects.create(name='foo')
+        assert a.slug == 'foo-3'
+
+    def test_single_query_strategy_update(self):
+        a = ModelWithSingleQueryStrategy.objects.create(name='test')
+        b = ModelWithSingleQueryStrategy.objects.create(name='test')
+        a.save()
+        b.save()
+        assert a.slug == 'test'
+        assert b.slug == 'test-2'
+
+    @unittest.skipIf('PyPy' in sys.version, PYPY_DATE_FUNC_SKIP_MSG)
+    def test_single_query_strategy_month(self):
+        a = ModelWithSingleQueryStrategyMonth(slug='test', date=datetime.date(2009, 9,  9))
+        b = ModelWithSingleQueryStrategyMonth(slug='test', date=datetime.date(2009, 9, 10))
+        c = ModelWithSingleQueryStrategyMonth(slug='test', date=datetime.date(2009, 10, 9))
+        for m in a,b,c:
+            m.save()
+        assert a.slug == 'test'
+        assert b.slug == 'test-2'
+        assert c.slug == 'test'
+
+    def test_single_query_strategy_long_name(self):
+        slugs = [ModelWithLongNameSingleQuery.objects.create(name='x' * 20).slug
+                 for x in range(12)]
+        assert slugs[:3] == ['xxxxxxxxxx', 'xxxxxxxx-2', 'xxxxxxxx-3']
+        assert slugs[8:11] == ['xxxxxxxx-9', 'xxxxxxx-10', 'xxxxxxx-11']
+
+    def test_windowed_strategy(self):
+        for x in range(3):
+            ModelWithWindowedStrategy.objects.create(name='Hello world!')
+        with self.assertNumQueries(1):
+            a = ModelWithWindowedStrategy(name='Hello world!')
+            a.slug = a._meta.get_field('slug').pre_save(a, True)
+        assert a.slug == 'hello-world-4'
+        a.save()
+        # windows of 4, then 8 candidates
+        with self.assertNumQueries(2):
+            b = ModelWithWindowedStrategy(name='Hello world!')
+            b.slug = b._meta.get_field('slug').pre_save(b, True)
+        assert b.slug == 'hello-world-5'
+        for x in range(8):
+            ModelWithWindowedStrategy.objects.create(name='Hello world!')
+        # windows of 4, 8 and 16 candidates
+        with self.assertNumQueries(3):
+            c = ModelWithWindowedStrategy(name='Hello world!')
+            c.slug = c._meta.get_field('slug').pre_save(c, True)
+        assert c.slug == 'hello-world-13'
+
+    def test_windowed_strategy_fractional_growth(self):
+        bulk_create(ModelWithWindowedStrategy,
+                    [ModelWithWindowedStrategy(name='foo') for x in range(30)])
+        field = ModelWithWindowedStrategy._meta.get_field('slug')
+        # windows of 4, 5, 6, 8 and 10 candidates (int(4 * 1.2) would be 4)
+        with mock.patch.object(field, 'window_growth', 1.2):
+            with self.assertNumQueries(5):
+                a = ModelWithWindowedStrategy(name='foo')
+                a.slug = field.pre_save(a, True)
+            assert a.slug == 'foo-31'
+            assert get_probe_queries(field, 200, 'windowed') < 20
+
+    def test_windowed_strategy_update(self):
+        a = ModelWithWindowedStrategy.objects.create(name='test')
+        b = ModelWithWindowedStrategy.objects.create(name='test')
+        a.save()
+        b.save()
+        assert a.slug == 'test'
+        assert b.slug == 'test-2'
+
+    def test_optimistic_strategy(self):
+        # savepoint, insert, release
+        with self.assertNumQueries(3):
+            a = ModelWithOptimisticStrategy.objects.create(name='Hello world!')
+        assert a.slug == 'hello-world'
+        # savepoint, failed insert, rollback and release, rivals, insert
+        with self.assertNumQueries(6):
+            b = ModelWithOptimisticStrategy.objects.create(name='Hello world!')
+        assert b.slug == 'hello-world-2'
+        assert ModelWithOptimisticStrategy.objects.get(pk=b.pk).slug == 'hello-world-2'
+        b.save()
+        assert b.slug == 'hello-world-2'
+
+    def test_optimistic_strategy_bulk_create(self):
+        # rows inserted without Model.save() are not retried, so they are checked
+        ModelWithOptimisticStrategy.objects.create(name='foo')
+        a, = ModelWithOptimisticStrategy.objects.bulk_create([ModelWithOptimisticStrategy(name='foo')])
+        assert a.slug == 'foo-2'
+
+    def test_optimistic_strategy_signal(self):
+        ModelWithOptimisticStrategy.objects.create(name='foo')
+        events = []
+        def receiver(sender, **kwargs):
+            events.append(kwargs)
+        slug_generated.connect(receiver, sender=ModelWithOptimisticStrategy)
+        try:
+            ModelWithOptimisticStrategy.objects.create(name='foo')
+        finally:
+            slug_generated.disconnect(receiver, sender=ModelWithOptimisticStrategy)
+        # the rejected attempt and the retry
+        assert [(e['slug'], e['queries']) for e in events] == [('foo', 0), ('foo-2', 1)]
+
+    def test_optimistic_strategy_unique_with(self):
+        sm1 = SimpleModel.objects.create(name='test')
+        sm2 = SimpleModel.objects.create(name='test2')
+        a = ModelWithOptimisticStrategyFK.objects.create(name='foo', simple_model=sm1)
+        b = ModelWithOptimisticStrategyFK.objects.create(name='foo', simple_model=sm2)
+        c = ModelWithOptimisticStrategyFK.objects.create(name='foo', simple_model=sm1)
+        assert [a.slug, b.slug, c.slug] == ['foo', 'foo', 'foo-2']
+        # the constraint would not catch duplicates with NULL
+        d = ModelWithOptimisticStrategyFK.objects.create(name='foo')
+        e = ModelWithOptimisticStrategyFK.objects.create(name='foo')
+        assert [d.slug, e.slug] == ['foo', 'foo-2']
+
+    @unittest.skipIf('PyPy' in sys.version, PYPY_DATE_FUNC_SKIP_MSG)
+    def test_optimistic_strategy_month(self):
+        a = ModelWithOptimisticStrategyMonth(slug='test', date=datetime.date(2009, 9,  9))
+        b = ModelWithOptimisticStrategyMonth(slug='test', date=datetime.date(2009, 9, 10))
+        c = ModelWithOptimisticStrategyMonth(slug='test', date=datetime.date(2009, 10, 9))
+        for m in a,b,c:
+            m.save()
+        assert [a.slug, b.slug, c.slug] == ['test', 'test-2', 'test']
+
+    def test_optimistic_strategy_constraint(self):
+        assert not ModelWithOptimisticStrategy._meta.constraints
+        constraint, = ModelWithOptimisticStrategyFK._meta.constraints
+        assert constraint.fields == ('simple_model', 'slug')
+        constraint, = ModelWithOptimisticStrategyMonth._meta.constraints
+        assert len(constraint.expressions) == 3
+        # the constraint is picked up by migrations...
+        state = ModelState.from_model(ModelWithOptimisticStrategyMonth)
+        assert state.options['constraints'][0].name == constraint.name
+        # ...and not added twice to the historical model
+        model = state.render(StateApps([], {}))
+        assert len(model._meta.constraints) == 1
+
+    def test_scope_index(self):
+        index, = ModelWithScopeIndex._meta.indexes
+        assert index.fields == ['simple_model', 'slug', 'date']
+        assert index.name
+        state = ModelState.from_model(ModelWithScopeIndex)
+        assert state.options['indexes'][0].name == index.name
+        model = state.render(StateApps([], {}))
+        assert len(model._meta.indexes) == 1
+        field = ModelWithScopeIndex._meta.get_field('slug')
+        assert field.deconstruct()[3]['scope_index'] is True
+        assert field.check() == []
+
+    def test_scope_index_check(self):
+        errors = ModelWithUniqueSlugDate._meta.get_field('slug').check()
+        assert [error.id for error in errors] == ['autoslug.W002']
+        # foreign keys are indexed
+        assert ModelWithUniqueSlugFKNull._meta.get_field('slug').check() == []
+        assert ModelWithCounterAllocatorFK._meta.get_field('slug').check() == []
+        # the optimistic strategy adds a unique constraint over the fields
+        assert ModelWithOptimisticStrategyFK._meta.get_field('slug').check() == []
+        # nothing to index
+        assert ModelWithUniqueSlugFK._meta.get_field('slug').check() == []
+
+    def test_several_slug_fields(self):
+        ModelWithSeveralSlugs.objects.create(name='Hello world')
+        a = ModelWithSeveralSlugs(name='Hello world')
+        # one query for the rivals of all fields
+        with self.assertNumQueries(2):
+            a.save()
+        assert (a.slug, a.handle, a.code) == ('hello-world-2', 'hello-world_2', 'hel-2')
+        # unchanged slugs are kept as they are
+        a = ModelWithSeveralSlugs.objects.get(pk=a.pk)
+        with self.assertNumQueries(1):
+            a.save()
+        a.handle = 'hello-world'
+        a.save()
+        assert (a.slug, a.handle) == ('hello-world-2', 'hello-world_2')
+
+    def test_several_slug_fields_order(self):
+        a = ModelWithSeveralSlugsDate.objects.create(name='foo')
+        ModelWithSeveralSlugsDate.objects.filter(pk=a.pk).update(date=datetime.date(2009, 9, 9))
+        # the date is set after the first slug, so the second one is not
+        # resolved along with it
+        b = ModelWithSeveralSlugsDate.objects.create(name='foo')
+        assert (b.slug, b.date_slug) == ('foo-2', 'foo')
+
+    def test_unique_condition(self):
+        a = ModelWithUniqueCondition.objects.create(name='foo', is_archived=True)
+        ModelWithUniqueCondition.objects.create(name='foo', is_archived=True)
+        b = ModelWithUniqueCondition.objects.create(name='foo')
+        c = ModelWithUniqueCondition.objects.create(name='foo')
+        assert (a.slug, b.slug, c.slug) == ('foo', 'foo', 'foo-2')
+        # the database only allows duplicates among archived rows
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                ModelWithUniqueCondition.objects.filter(pk=c.pk).update(slug='foo')
+        constraint, = ModelWithUniqueCondition._meta.constraints
+        assert constraint.condition == Q(is_archived=False)
+
+        field = ModelWithUniqueCondition._meta.get_field('slug')
+        assert not field._unique
+        kwargs = field.deconstruct()[3]
+        assert kwargs['unique'] is True
+        assert kwargs['unique_condition'] == Q(is_archived=False)
+
+        with self.assertRaises(ValueError):
+            AutoSlugField(unique_condition=Q(is_archived=False))
+
+    def test_unique_condition_scope(self):
+        sm = SimpleModel.objects.create(name='test')
+        ModelWithUniqueConditionFK.objects.create(name='foo', simple_model=sm, is_archived=True)
+        objs = [ModelWithUniqueConditionFK(name='foo', simple_model=sm) for i in range(2)]
+        bulk_create(ModelWithUniqueConditionFK, objs)
+        assert [obj.slug for obj in objs] == ['foo', 'foo-2']
+        # the unique constraint covers the scope index
+        assert ModelWithUniqueConditionFK._meta.indexes == []
+        constraint, = ModelWithUniqueConditionFK._meta.constraints
+        assert list(constraint.fields) == ['simple_model', 'slug']
+        assert constraint.condition == Q(is_archived=False)
+        assert ModelWithUniqueConditionFK._meta.get_field('slug').check() == []
+
+    def test_optimistic_strategy_unrelated_error(self):
+        a = ModelWithOptimisticStrategy.objects.create(name='test')
+        b = ModelWithOptimisticStrategy(pk=a.pk, name='other')
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                b.save(force_insert=True)
+        assert b.slug == 'other'
+
+    def test_unknown_collision_strategy(self):
+        with self.assertRaises(ValueError):
+            AutoSlugField(collision_strategy='guess')
+        with self.assertRaises(ValueError):
+            AutoSlugField(collision_strategy='windowed', window_size=0)
+
+    def test_bulk_create(self):
+        ModelWithUniqueSlug.objects.create(name='Hello world!')
+        objs = [ModelWithUniqueSlug(name=name) for name in
+                ('Hello world!', 'Hello world!', 'Hello', 'Hello world!')]
+        with self.assertNumQueries(2):
+            bulk_create(ModelWithUniqueSlug, objs)
+        assert [x.slug for x in objs] == ['hello-world-2', 'hello-world-3',
+                                          'hello', 'hello-world-4']
+        assert ModelWithUniqueSlug.objects.filter(slug='hello-world-4').exists()
+
+    def test_bulk_create_same_slug(self):
+        ModelWithUniqueSlug.objects.create(name='foo')
+        objs = [ModelWithUniqueSlug(name='foo') for x in range(100)]
+        # each candidate is tried once, not once per instance
+        with mock.patch('autoslug.utils.get_indexed_slug',
+                        wraps=utils.get_indexed_slug) as get_indexed_slug:
+            bulk_create(ModelWithUniqueSlug, objs)
+        assert get_indexed_slug.call_count <= 2 * 101
+        assert [x.slug for x in objs[-2:]] == ['foo-100', 'foo-101']
+
+    def test_bulk_create_not_unique(self):
+        objs = bulk_create(SimpleModel, [SimpleModel(name='test') for x in range(2)])
+        assert [x.slug for x in objs] == ['simplemodel', 'simplemodel']
+
+    def test_populate_bulk_unique_with(self):
+        sm1 = SimpleModel.objects.create(name='test')
+        sm2 = SimpleModel.objects.create(name='test2')
+        ModelWithUniqueSlugFK.objects.create(name='Hello', simple_model=sm1)
+        objs = [ModelWithUniqueSlugFK(name='Hello', simple_model=sm) for sm in (sm1, sm2, sm2)]
+        field = ModelWithUniqueSlugFK._meta.get_field('slug')
+        assert field.populate_bulk(objs) == ['hello-2', 'hello', 'hello-2']
+
+    def test_populate_bulk_regenerate(self):
+        objs = [ModelWithUniqueSlug.objects.create(name='test') for x in range(3)]
+        for obj in objs:
+            obj.name = 'new test'
+        field = ModelWithUniqueSlug._meta.get_field('slug')
+        assert field.populate_bulk(objs) == ['test', 'test-2', 'test-3']
+        assert field.populate_bulk(objs, regenerate=True) == [
+            'new-test', 'new-test-2', 'new-test-3']
+
     def test_nullable(self):
         a = ModelWithNullable.objects.create(name=None)
         assert a.slug is None
@@ -216,6 +663,22 @@ class AutoSlugFieldTestCase(TestCase):
         with self.assertRaises(ValueError, msg=errmsg):
             a.save()
 
+    def test_unique_with_checks(self):
+        for model in (ModelWithReferenceToItself, ModelWithWrongReferencedField,
+                      ModelWithWrongLookupInUniqueWith):
+            errors = model._meta.get_field('slug').check()
+            assert [error.id for error in errors] == ['autoslug.E001']
+        errors = ModelWithWrongFieldOrder._meta.get_field('slug').check()
+        assert 'autoslug.E001' not in [error.id for error in errors]
+
+    def test_uniqueness_plan(self):
+        plan = ModelWithUniqueSlugMonth._meta.get_field('slug').get_uniqueness_plan()
+        assert [(lookup.name, lookup.date_parts) for lookup in plan] == [
+            ('date', ('year', 'month'))]
+        plan = ModelWithUniqueSlugFK._meta.get_field('slug').get_uniqueness_plan()
+        assert [(lookup.name, lookup.is_relation, lookup.inner_lookup) for lookup in plan] == [
+            ('simple_model', True, 'name')]
+
     def test_wrong_field_order(self):
         a = ModelWithWrongFieldOrder(slug='test')
         errmsg = (
@@ -323,6 +786,583 @@ class AutoSlugFieldTestCase(TestCase):
         assert len(b.slug) == 50         # slug cropped
         assert b.slug[-4:] == 'xx-2'    # unique without dash
 
+    def test_slug_generated_signal(self):
+        events = []
+        def receiver(sender, **kwargs):
+            events.append(kwargs)
+        ModelWithUniqueSlug.objects.create(name='foo')
+        slug_generated.connect(receiver, sender=ModelWithUniqueSlug)
+        try:
+            ModelWithUniqueSlug.objects.create(name='foo')
+            SimpleModel.objects.create(name='foo')    # other sender
+        finally:
+            slug_generated.disconnect(receiver, sender=ModelWithUniqueSlug)
+        ModelWithUniqueSlug.objects.create(name='foo')
+        assert len(events) == 1
+        event = events[0]
+        assert event['base'] == 'foo'
+        assert event['slug'] == 'foo-2'
+        assert event['candidates'] == 2
+        assert event['queries'] >= 1
+        assert event['db_time'] >= 0
+        assert event['slugify_time'] >= 0
+
+    def test_slugs_generated_signal(self):
+        events = []
+        def receiver(sender, **kwargs):
+            events.append(kwargs)
+        ModelWithUniqueSlug.objects.create(name='foo')
+        slugs_generated.connect(receiver, sender=ModelWithUniqueSlug)
+        try:
+            bulk_create(ModelWithUniqueSlug, [ModelWithUniqueSlug(name='foo'), ModelWithUniqueSlug(name='bar')])
+        finally:
+            slugs_generated.disconnect(receiver, sender=ModelWithUniqueSlug)
+        event, = events
+        assert event['bases'] == ['foo', 'bar']
+        assert event['slugs'] == ['foo-2', 'bar']
+        assert event['candidates'] == [2, 1]
+        assert event['queries'] == 1
+
+
+class InlineExecutor(concurrent.futures.Executor):
+    """
+    Runs the tasks in the current process (and its in-memory test database).
+    """
+    def submit(self, fn, *args, **kwargs):
+        future = concurrent.futures.Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+class AutoSlugRebuildTestCase(TestCase):
+
+    def rebuild(self, *args, **kwargs):
+        out = io.StringIO()
+        call_command('autoslug_rebuild', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_rebuild(self):
+        for name in ('foo', 'bar', 'foo', 'baz'):
+            ModelWithUniqueSlug.objects.create(name=name)
+        ModelWithUniqueSlug.objects.update(name='Hello world!')
+        out = self.rebuild('autoslug.ModelWithUniqueSlug', chunk_size=3)
+        self.assertIn('Rebuilt 3 rows', out)
+        self.assertIn('Rebuilt 4 rows', out)
+        slugs = list(ModelWithUniqueSlug.objects.order_by('pk').values_list('slug', flat=True))
+        assert slugs == ['hello-world', 'hello-world-2', 'hello-world-3', 'hello-world-4']
+
+    def test_rebuild_queries(self):
+        for x in range(4):
+            ModelWithUniqueSlug.objects.create(name='test')
+        # one streamed SELECT, then per chunk: rivals, update and a savepoint pair
+        with self.assertNumQueries(1 + 2 * 4):
+            self.rebuild('autoslug.ModelWithUniqueSlug', chunk_size=2)
+
+    def test_rebuild_same_slug(self):
+        bulk_create(ModelWithUniqueSlug, [ModelWithUniqueSlug(name='foo') for x in range(200)])
+        ModelWithUniqueSlug.objects.update(name='bar')
+        # each candidate is tried about once, not once per row
+        with mock.patch('autoslug.utils.get_indexed_slug',
+                        wraps=utils.get_indexed_slug) as get_indexed_slug:
+            self.rebuild('autoslug.ModelWithUniqueSlug', chunk_size=100)
+        assert get_indexed_slug.call_count <= 3 * 200
+        assert ModelWithUniqueSlug.objects.filter(slug='bar-200').exists()
+
+    def test_rebuild_resume(self):
+        a, b = [ModelWithUniqueSlug.objects.create(name='test') for x in range(2)]
+        ModelWithUniqueSlug.objects.update(name='new')
+        self.rebuild('autoslug.ModelWithUniqueSlug', resume_from=a.pk)
+        a.refresh_from_db()
+        b.refresh_from_db()
+        assert a.slug == 'test'
+        assert b.slug == 'new'
+
+    def test_rebuild_unique_with(self):
+        sm1 = SimpleModel.objects.create(name='test')
+        sm2 = SimpleModel.objects.create(name='test2')
+        for sm in (sm1, sm2, sm1):
+            ModelWithUniqueSlugFK.objects.create(name='foo', simple_model=sm)
+        ModelWithUniqueSlugFK.objects.update(name='bar')
+        self.rebuild('autoslug.ModelWithUniqueSlugFK', field='slug')
+        slugs = list(ModelWithUniqueSlugFK.objects.order_by('pk').values_list('slug', flat=True))
+        assert slugs == ['bar', 'bar', 'bar-2']
+
+    def rebuild_parallel(self, model):
+        command = Command(stdout=io.StringIO())
+        field = model._meta.get_field('slug')
+        total = command.rebuild_parallel(field, 2, 2, executor=InlineExecutor())
+        assert 'rows/sec' in command.stdout.getvalue()
+        return total
+
+    def test_rebuild_parallel_shared_nothing(self):
+        a = ModelWithUniqueSlug.objects.create(name='a')
+        b = ModelWithUniqueSlug.objects.create(name='b')
+        c = ModelWithUniqueSlug.objects.create(name='b')
+        ModelWithUniqueSlug.objects.filter(pk=a.pk).update(name='b')
+        ModelWithUniqueSlug.objects.filter(pk=b.pk).update(name='a')
+        assert self.rebuild_parallel(ModelWithUniqueSlug) == 3
+        slugs = list(ModelWithUniqueSlug.objects.order_by('pk').values_list('slug', flat=True))
+        # same as saving the rows one by one: "b" and "b-2" were still taken
+        # when the first row was rebuilt
+        assert slugs == ['b-3', 'a', 'b']
+
+    def test_rebuild_parallel_shared_nothing_unchanged(self):
+        for x in range(3):
+            ModelWithUniqueSlug.objects.create(name='foo')
+        ModelWithUniqueSlug.objects.filter(slug='foo-2').update(name='bar')
+        assert self.rebuild_parallel(ModelWithUniqueSlug) == 3
+        slugs = list(ModelWithUniqueSlug.objects.order_by('pk').values_list('slug', flat=True))
+        # a row may keep its own slug; "foo-2" is free once its row is rebuilt
+        assert slugs == ['foo', 'bar', 'foo-2']
+
+    def test_rebuild_parallel_same_slug(self):
+        bulk_create(ModelWithUniqueSlug, [ModelWithUniqueSlug(name='foo') for x in range(200)])
+        ModelWithUniqueSlug.objects.update(name='bar')
+        with mock.patch('autoslug.utils.get_indexed_slug',
+                        wraps=utils.get_indexed_slug) as get_indexed_slug:
+            assert self.rebuild_parallel(ModelWithUniqueSlug) == 200
+        assert get_indexed_slug.call_count <= 3 * 200
+        assert ModelWithUniqueSlug.objects.filter(slug='bar-200').exists()
+
+    def test_rebuild_parallel_partitioned(self):
+        sm1 = SimpleModel.objects.create(name='test')
+        sm2 = SimpleModel.objects.create(name='test2')
+        for sm in (sm1, sm2, sm1, None, None):
+            ModelWithUniqueSlugFKNull.objects.create(name='foo', simple_model=sm)
+        ModelWithUniqueSlugFKNull.objects.update(name='bar')
+        assert self.rebuild_parallel(ModelWithUniqueSlugFKNull) == 5
+        slugs = list(ModelWithUniqueSlugFKNull.objects.order_by('pk').values_list('slug', flat=True))
+        assert slugs == ['bar', 'bar', 'bar-2', 'bar', 'bar-2']
+
+    @unittest.skipIf('PyPy' in sys.version, PYPY_DATE_FUNC_SKIP_MSG)
+    def test_rebuild_parallel_partitioned_by_date(self):
+        for date in ((2009, 9, 9), (2009, 9, 10), (2009, 10, 9), (2009, 9, 11)):
+            ModelWithUniqueSlugMonth.objects.create(slug='foo', date=datetime.date(*date))
+        assert self.rebuild_parallel(ModelWithUniqueSlugMonth) == 4
+        slugs = list(ModelWithUniqueSlugMonth.objects.order_by('pk').values_list('slug', flat=True))
+        assert slugs == ['foo', 'foo-2', 'foo', 'foo-3']
+
+    @unittest.skipIf('fork' not in multiprocessing.get_all_start_methods(),
+                     'worker processes are forked')
+    def test_rebuild_workers(self):
+        for x in range(3):
+            ModelWithUniqueSlug.objects.create(name='test')
+        ModelWithUniqueSlug.objects.update(name='new')
+        out = self.rebuild('autoslug.ModelWithUniqueSlug', workers=2)
+        self.assertIn('rows/sec', out)
+        slugs = list(ModelWithUniqueSlug.objects.order_by('pk').values_list('slug', flat=True))
+        assert slugs == ['new', 'new-2', 'new-3']
+
+    def test_rebuild_wrong_field(self):
+        with self.assertRaises(CommandError):
+            self.rebuild('autoslug.ModelWithUniqueSlug', field='name')
+        with self.assertRaises(CommandError):
+            self.rebuild('autoslug.NoSuchModel')
+
+
+class AutoSlugStatsTestCase(TestCase):
+
+    def setUp(self):
+        self.registry = SlugStats(top_size=2)
+        self.registry.connect()
+        self.addCleanup(self.registry.disconnect)
+
+    def stats(self, *args, **kwargs):
+        out = io.StringIO()
+        call_command('autoslug_stats', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_registry(self):
+        for name in ('foo', 'foo', 'foo', 'bar'):
+            ModelWithUniqueSlug.objects.create(name=name)
+        bulk_create(ModelWithUniqueSlug, [ModelWithUniqueSlug(name='bar')])
+        info = self.registry.info()['autoslug.ModelWithUniqueSlug.slug']
+        assert info['slugs'] == 5
+        assert info['collisions'] == 3
+        assert info['collision_rate'] == 0.6
+        assert info['candidates']['max'] == 3
+        assert info['candidates']['buckets'] == [(1, 1, 2), (2, 3, 3)]
+        assert info['top_collisions'] == [('foo', 2), ('bar', 1)]
+
+        self.registry.clear()
+        assert self.registry.info() == {}
+
+    def test_registry_bounded(self):
+        for name in ('foo', 'foo', 'bar', 'bar', 'bar', 'baz', 'baz', 'baz', 'baz'):
+            ModelWithUniqueSlug.objects.create(name=name)
+        info = self.registry.info()['autoslug.ModelWithUniqueSlug.slug']
+        # "baz" replaced the least frequent "foo" and inherited its count
+        assert info['top_collisions'] == [('baz', 4), ('bar', 2)]
+
+    def test_probe_queries(self):
+        field = ModelWithUniqueSlug._meta.get_field('slug')
+        assert get_probe_queries(field, 1) == 1
+        assert get_probe_queries(field, 7) == 7
+        assert get_probe_queries(field, 1, 'optimistic') == 0
+        assert get_probe_queries(field, 7, 'optimistic') == 2
+        assert get_probe_queries(field, 7, 'single_query') == 1
+        assert get_probe_queries(field, 1000, 'single_query') == 2
+        assert get_probe_queries(field, field.window_size, 'windowed') == 1
+        assert get_probe_queries(field, field.window_size + 1, 'windowed') == 2
+
+    def test_command_dump(self):
+        ModelWithUniqueSlug.objects.create(name='foo')
+        ModelWithUniqueSlug.objects.create(name='foo')
+        with mock.patch('autoslug.stats.registry', self.registry):
+            out = self.stats()
+            data = json.loads(self.stats(json=True))
+        self.assertIn('autoslug.ModelWithUniqueSlug.slug: 2 slugs, 1 collisions (50.0%)', out)
+        self.assertIn('top collisions: foo (1)', out)
+        assert data['autoslug.ModelWithUniqueSlug.slug']['collisions'] == 1
+
+        with mock.patch('autoslug.stats.registry', SlugStats()):
+            self.assertIn('No statistics collected', self.stats())
+
+    def test_command_scan(self):
+        for name in ('foo', 'foo', 'foo', 'bar', 'room 101'):
+            ModelWithUniqueSlug.objects.create(name=name)
+        out = self.stats('autoslug.ModelWithUniqueSlug', top=1)
+        self.assertIn('5 rows in 1 scopes, 3 base slugs', out)
+        self.assertIn('base slugs with clashes: 1 (3 rows, 60.0%)', out)
+        self.assertIn('foo: 3 slugs, next index 4', out)
+        self.assertNotIn('bar:', out)
+        # foo: 4 queries, bar and room-101: 2 queries each
+        self.assertIn('* linear: 3.2 / 4', out)
+
+        data = json.loads(self.stats('autoslug.ModelWithUniqueSlug', json=True))
+        assert data['probe_queries']['single_query'] == [1, 1]
+
+    def test_command_scan_scopes(self):
+        a = SimpleModel.objects.create(name='a')
+        b = SimpleModel.objects.create(name='b')
+        for instance in (a, a, b):
+            ModelWithUniqueSlugFK.objects.create(name='foo', simple_model=instance)
+        data = json.loads(self.stats('autoslug.ModelWithUniqueSlugFK', json=True))
+        assert data['scopes'] == 2
+        assert data['families'] == 2
+        assert data['largest'] == [['foo', 2, 3], ['foo', 1, 2]]
+
+    def test_command_scan_unique_condition(self):
+        for name in ('foo', 'foo'):
+            ModelWithUniqueCondition.objects.create(name=name)
+        # rows outside the condition do not count
+        ModelWithUniqueCondition.objects.create(name='foo', is_archived=True)
+        ModelWithUniqueCondition.objects.filter(slug='foo').update(is_archived=True)
+        data = json.loads(self.stats('autoslug.ModelWithUniqueCondition', json=True))
+        assert data['rows'] == 1
+        assert data['largest'] == [['foo-2', 1, 2]]
+
+    def test_command_scan_not_unique(self):
+        with self.assertRaises(CommandError):
+            self.stats('autoslug.SimpleModel')
+
+
+class AutoSlugCounterAllocatorTestCase(TestCase):
+
+    def test_allocate(self):
+        slugs = [ModelWithCounterAllocator.objects.create(name='untitled').slug
+                 for x in range(4)]
+        assert slugs == ['untitled', 'untitled-2', 'untitled-3', 'untitled-4']
+        counter = SlugCounter.objects.get()
+        assert counter.model == 'autoslug.modelwithcounterallocator.slug'
+        assert counter.slug == 'untitled'
+        assert counter.value == 4
+
+    def test_allocate_queries(self):
+        for x in range(50):
+            ModelWithCounterAllocator.objects.create(name='untitled')
+        # check the slug, increment (savepoint, update, select, release),
+        # verify the candidate, insert
+        with self.assertNumQueries(7):
+            a = ModelWithCounterAllocator.objects.create(name='untitled')
+        assert a.slug == 'untitled-51'
+
+    def test_allocate_update(self):
+        a = ModelWithCounterAllocator.objects.create(name='test')
+        b = ModelWithCounterAllocator.objects.create(name='test')
+        a.save()
+        b.save()
+        assert [a.slug, b.slug] == ['test', 'test-2']
+        assert SlugCounter.objects.get().value == 2
+
+    def test_allocate_unique_with(self):
+        sm1 = SimpleModel.objects.create(name='test')
+        sm2 = SimpleModel.objects.create(name='test2')
+        slugs = [ModelWithCounterAllocatorFK.objects.create(name='foo', simple_model=sm).slug
+                 for sm in (sm1, sm2, sm1, sm2, sm1)]
+        assert slugs == ['foo', 'foo', 'foo-2', 'foo-2', 'foo-3']
+        assert SlugCounter.objects.count() == 2
+
+    def test_counter_behind(self):
+        for x in range(3):
+            ModelWithUniqueSlug.objects.create(name='test')
+        ModelWithUniqueSlug.objects.update(name='x')
+        # rows created before the allocator was enabled
+        for slug in ('test', 'test-2', 'test-3'):
+            ModelWithCounterAllocator.objects.create(name='x', slug=slug)
+        a = ModelWithCounterAllocator.objects.create(name='test')
+        assert a.slug == 'test-4'
+        assert SlugCounter.objects.get().value == 4
+        b = ModelWithCounterAllocator.objects.create(name='test')
+        assert b.slug == 'test-5'
+
+    def test_write_database(self):
+        ModelWithCounterAllocator.objects.create(name='test')
+        a = ModelWithCounterAllocator(name='test')
+        with mock.patch('autoslug.allocators.router') as router, \
+                mock.patch.object(CounterAllocator, 'next_index', return_value=2) as next_index:
+            router.db_for_write.return_value = 'counters'
+            a.save()
+        assert a.slug == 'test-2'
+        # not the database the rivals are read from
+        router.db_for_write.assert_called_once_with(ModelWithCounterAllocator, instance=a)
+        assert next_index.call_args[0][0] == 'counters'
+
+    def test_max_length_check(self):
+        field = ModelWithCounterAllocator._meta.get_field('slug')
+        assert field.check() == []
+        with mock.patch.object(field, 'max_length', 256):
+            errors = field.check()
+        assert 'autoslug.E002' in [error.id for error in errors]
+        # the cache keys are hashed
+        field = ModelWithCacheAllocator._meta.get_field('slug')
+        with mock.patch.object(field, 'max_length', 256):
+            assert 'autoslug.E002' not in [error.id for error in field.check()]
+
+    def test_counter_behind_concurrent(self):
+        for slug in ('test', 'test-2', 'test-3'):
+            ModelWithCounterAllocator.objects.create(name='x', slug=slug)
+        field = ModelWithCounterAllocator._meta.get_field('slug')
+        allocator = field.get_allocator()
+        rivals = ModelWithCounterAllocator.objects.all()
+        find_free_index = allocator.find_free_index
+        slugs = []
+        writers = []
+
+        def concurrent_writer(*args):
+            # another writer runs into the stale counter at the same time
+            if not writers:
+                writers.append(None)
+                slugs.append(allocator.allocate(field, rivals, 'test', ()))
+            return find_free_index(*args)
+
+        with mock.patch.object(allocator, 'find_free_index', concurrent_writer):
+            slugs.append(allocator.allocate(field, rivals, 'test', ()))
+        assert slugs == ['test-4', 'test-5']
+
+    def test_seed_counters(self):
+        for slug in ('test', 'test-2', 'test-7', 'other', 'other-x'):
+            ModelWithCounterAllocator.objects.create(name='x', slug=slug)
+        SlugCounter.objects.all().delete()
+        out = io.StringIO()
+        call_command('autoslug_seed_counters', 'autoslug.ModelWithCounterAllocator', stdout=out)
+        self.assertIn('1 created, 0 updated', out.getvalue())
+        assert SlugCounter.objects.get().value == 7
+        with self.assertNumQueries(7):
+            a = ModelWithCounterAllocator.objects.create(name='test')
+        assert a.slug == 'test-8'
+
+    def test_seed_counters_unique_with(self):
+        sm1 = SimpleModel.objects.create(name='test')
+        sm2 = SimpleModel.objects.create(name='test2')
+        for sm in (sm1, sm2, sm1, sm1):
+            ModelWithCounterAllocatorFK.objects.create(name='foo', simple_model=sm)
+        SlugCounter.objects.update(value=1)
+        call_command('autoslug_seed_counters', 'autoslug.ModelWithCounterAllocatorFK',
+                     stdout=io.StringIO())
+        assert SlugCounter.objects.get().value == 3
+        a = ModelWithCounterAllocatorFK.objects.create(name='foo', simple_model=sm1)
+        assert a.slug == 'foo-4'
+
+
+class AutoSlugCacheAllocatorTestCase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_allocate(self):
+        slugs = [ModelWithCacheAllocator.objects.create(name='untitled').slug
+                 for x in range(4)]
+        assert slugs == ['untitled', 'untitled-2', 'untitled-3', 'untitled-4']
+
+    def test_allocate_queries(self):
+        for x in range(50):
+            ModelWithCacheAllocator.objects.create(name='untitled')
+        # check the slug, verify the candidate, insert
+        with self.assertNumQueries(3):
+            a = ModelWithCacheAllocator.objects.create(name='untitled')
+        assert a.slug == 'untitled-51'
+
+    def test_evicted_counter(self):
+        for x in range(3):
+            ModelWithCacheAllocator.objects.create(name='test')
+        cache.clear()
+        # check the slug, verify the candidate, fetch the family, verify the
+        # reserved candidate, insert
+        with self.assertNumQueries(5):
+            a = ModelWithCacheAllocator.objects.create(name='test')
+        assert a.slug == 'test-4'
+        b = ModelWithCacheAllocator.objects.create(name='test')
+        assert b.slug == 'test-5'
+
+    def test_catch_up(self):
+        allocator = CacheAllocator()
+        key = ('autoslug.modelwithcacheallocator.slug', '', 'test')
+        allocator.catch_up('default', key, 3)
+        assert allocator.next_index('default', key) == 4
+        # a counter which has got further is not moved back
+        allocator.catch_up('default', key, 2)
+        assert allocator.next_index('default', key) == 5
+
+    def test_default_allocator_setting(self):
+        with mock.patch('autoslug.fields.default_allocator',
+                        'autoslug.allocators.CacheAllocator'):
+            field = AutoSlugField(unique=True)
+        assert isinstance(field.get_allocator(), CacheAllocator)
+        assert 'allocator' not in field.deconstruct()[3]
+        assert AutoSlugField(unique=True).get_allocator() is None
+
+
+class SlugifyCacheTestCase(TestCase):
+
+    def test_lru(self):
+        calls = []
+        def func(value):
+            calls.append(value)
+            return value.lower()
+        cache = SlugifyCache(2)
+        assert [cache.get(func, x) for x in 'ABAC'] == ['a', 'b', 'a', 'c']
+        assert calls == ['A', 'B', 'C']
+        assert cache.info() == dict(hits=1, misses=3, evictions=1, size=2, maxsize=2)
+        cache.get(func, 'A')        # still cached
+        cache.get(func, 'B')        # evicted
+        assert calls == ['A', 'B', 'C', 'B']
+        cache.clear()
+        assert cache.info()['size'] == 0
+
+    def test_keyed_by_function(self):
+        cache = SlugifyCache(10)
+        assert cache.get(str.lower, 'Foo') == 'foo'
+        assert cache.get(str.upper, 'Foo') == 'FOO'
+        assert cache.get(str.lower, 'Foo') == 'foo'
+        assert cache.info()['hits'] == 1
+
+    def test_unhashable_value(self):
+        cache = SlugifyCache(10)
+        assert cache.get(len, ['a', 'b']) == 2
+        assert cache.info()['size'] == 0
+
+    def test_threads(self):
+        cache = SlugifyCache(50)
+        values = [str(x % 80) for x in range(1000)]
+        def work():
+            for value in values:
+                assert cache.get(default_slugify, value) == value
+        threads = [threading.Thread(target=work) for x in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        info = cache.info()
+        assert info['hits'] + info['misses'] == 8000
+        assert info['size'] == 50
+
+    def test_field(self):
+        with mock.patch('autoslug.fields.slugify_cache_size', 100):
+            field = AutoSlugField(slugify=custom_slugify)
+            default_field = AutoSlugField()
+        assert isinstance(field.slugify, CachedSlugify)
+        assert field.slugify is cached_slugify(custom_slugify, 100)
+        assert field.slugify('Hello world') == 'hello_world'
+        assert field.deconstruct()[3]['slugify'] is custom_slugify
+        assert 'slugify' not in default_field.deconstruct()[3]
+
+
+class FastSlugifyTestCase(TestCase):
+    values = [
+        'Hello world!', '  --Foo__bar--  ', 'x_-_y', 'tab\tand\x1cseparator', '',
+        'Привет, мир', '北京欢迎你', 'Straße über', 'ÆØÅ — İstanbul', 'ﬁne 😀 emoji',
+    ]
+
+    def setUp(self):
+        try:
+            from autoslug.utils import fast_slugify, slugify
+        except ImportError:
+            raise unittest.SkipTest('Unidecode is not available, skipping test')
+        self.fast_slugify = fast_slugify
+        self.slugify = slugify
+
+    def test_same_as_default(self):
+        for value in self.values:
+            self.assertEqual(self.fast_slugify(value), self.slugify(value))
+
+    def test_max_length(self):
+        for value in self.values + ['xxxx ' * 20, 'xxxx_' * 20]:
+            for max_length in (1, 5, 49):
+                cropped = self.slugify(self.slugify(value)[:max_length])
+                self.assertEqual(self.fast_slugify(value, max_length=max_length), cropped)
+
+    def test_field_slugifies_once(self):
+        func = mock.Mock(wraps=self.fast_slugify, accepts_max_length=True)
+        field = AutoSlugField(slugify=func, max_length=10)
+        assert field.make_slug('Hello wonderful world', 'foo') == 'hello-wond'
+        func.assert_called_once_with('Hello wonderful world', max_length=10)
+        assert field.make_slug('?', 'foo') == 'foo'
+
+
+class TranslitSlugifyTestCase(TestCase):
+    def setUp(self):
+        try:
+            from autoslug.utils import translit_long, translit_short, translit_one
+        except ImportError:
+            raise unittest.SkipTest('translitcodec is not available, skipping test')
+        self.translit_long = translit_long
+        self.translit_short = translit_short
+        self.translit_one = translit_one
+
+    def test_slugify(self):
+        assert self.translit_long('Œuvre — «Straße», ½!') == 'oeuvre-strasse-1-2'
+        assert self.translit_short('Œuvre ½') == 'oeuvre-1-2'
+        assert self.translit_one('Æther ½') == 'ather-1-2'
+        assert self.translit_long('Hello, World', delim='_') == 'hello_world'
+        assert self.translit_long('Œuvre ☃', encoding='ascii') == 'oeuvre'
+
+    def test_pickle(self):
+        func = pickle.loads(pickle.dumps(self.translit_long))
+        assert func('Œuvre') == 'oeuvre'
+
+
+class SlugifyManyTestCase(TestCase):
+    values = ['Hello world', 'foo', 'Hello world', 'Bar!', 'foo', 'baz']
+    slugs = ['hello-world', 'foo', 'hello-world', 'bar', 'foo', 'baz']
+
+    def test_order_and_dedup(self):
+        func = mock.Mock(wraps=default_slugify)
+        slugs = slugify_many(iter(self.values), slugify=func, batch_size=3)
+        assert list(slugs) == self.slugs
+        # the second "foo" is in another batch
+        assert func.call_count == 5
+
+    def test_default_function(self):
+        assert list(slugify_many(self.values)) == self.slugs
+
+    def test_thread_pool(self):
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            slugs = slugify_many(self.values, executor=executor, chunk_size=2)
+            assert list(slugs) == self.slugs
+
+    @unittest.skipIf('fork' not in multiprocessing.get_all_start_methods(),
+                     'worker processes are forked')
+    def test_process_pool(self):
+        context = multiprocessing.get_context('fork')
+        with concurrent.futures.ProcessPoolExecutor(2, mp_context=context) as executor:
+            slugs = slugify_many(self.values, executor=executor, chunk_size=2)
+            assert list(slugs) == self.slugs
+            # cached functions are picklable too
+            func = cached_slugify(default_slugify, 100)
+            slugs = slugify_many(self.values, slugify=func, executor=executor)
+            assert list(slugs) == self.slugs
+
 
 class AutoSlugModelTranslationTestCase(TestCase):
 
@@ -335,3 +1375,179 @@ class AutoSlugModelTranslationTestCase(TestCase):
         """
         a = ModeltranslationOne(title='hello', description='foo')
         a.save()
+
+    @mock.patch('autoslug.fields.autoslug_modeltranslation_enable', True)
+    def test_localized_slugs(self):
+        field = ModeltranslationTwo._meta.get_field('slug')
+        field._localized_fields = None
+        self.addCleanup(setattr, field, '_localized_fields', None)
+
+        a = ModeltranslationTwo.objects.create(title_en='Hello', title_ru='Privet')
+        assert (a.slug_en, a.slug_ru) == ('hello', 'privet')
+        b = ModeltranslationTwo(title_en='Hello', title_ru='Privet')
+        with CaptureQueriesContext(connection) as queries:
+            b.save()
+        assert (b.slug_en, b.slug_ru) == ('hello-2', 'privet-2')
+        # one query for all localized slugs, one for the slug, no UPDATE
+        assert len(queries) == 3
+        assert queries[-1]['sql'].startswith('INSERT')
+        # existing localized slugs are kept
+        b.title_ru = 'Poka'
+        b.save()
+        assert ModeltranslationTwo.objects.get(pk=b.pk).slug_ru == 'privet-2'
+
+    @mock.patch('autoslug.fields.autoslug_modeltranslation_enable', True)
+    def test_localized_slugs_bulk_create(self):
+        field = ModeltranslationTwo._meta.get_field('slug')
+        field._localized_fields = None
+        self.addCleanup(setattr, field, '_localized_fields', None)
+
+        ModeltranslationTwo.objects.create(title_en='Hello', title_ru='Privet')
+        objs = [ModeltranslationTwo(title_en='Hello', title_ru='Privet'),
+                ModeltranslationTwo(title_en='Hello', title_ru='Poka')]
+        bulk_create(ModeltranslationTwo, objs)
+        slugs = ModeltranslationTwo.objects.order_by('pk').values_list('slug_en', 'slug_ru')
+        assert list(slugs) == [('hello', 'privet'), ('hello-2', 'privet-2'), ('hello-3', 'poka')]
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Exact numbers of queries per save for each configuration of the field, so
+    that an extra query (e.g. fetching a related object to build the lookups)
+    fails like any other regression. Unless noted otherwise, a save costs the
+    lookups of rivals plus the INSERT or UPDATE.
+    """
+    def setUp(self):
+        self.simple_model = SimpleModel.objects.create(name='a')
+        self.date = datetime.date(2020, 5, 15)
+
+    def assertSaves(self, make, *budgets):
+        """
+        Creates an instance with `make()` and checks the number of queries of
+        each save against `budgets`: the first one, then a clashing one, etc.
+        Returns the last instance.
+        """
+        for num in budgets:
+            instance = make()
+            with self.assertNumQueries(num):
+                instance.save()
+        return instance
+
+    def test_not_unique(self):
+        # nothing to look up
+        for make in (lambda: SimpleModel(name='foo'),
+                     lambda: ModelWithLongName(name='x' * 300),
+                     lambda: ModelWithCallable(name='foo'),
+                     lambda: ModelWithCallableAttr(name='foo'),
+                     lambda: ModelWithNullable(name='foo'),
+                     lambda: ModelWithBlank(name='foo'),
+                     lambda: ModelWithAutoUpdateEnabled(name='foo')):
+            self.assertSaves(make, 1, 1)
+
+    def test_unique(self):
+        # the linear strategy checks "foo", then "foo-2"
+        for make in (lambda: ModelWithUniqueSlug(name='foo'),
+                     lambda: ModelWithLongNameUnique(name='x' * 300),
+                     lambda: ModelWithCustomSlugifier(slug='foo bar'),
+                     lambda: ModelWithCustomSeparator(slug='foo'),
+                     lambda: ModelWithUniqueAutoUpdate(name='foo'),
+                     lambda: ModelWithCacheAllocator(name='foo')):
+            self.assertSaves(make, 2, 3)
+        # with a primary key given, Django tries an UPDATE before the INSERT
+        self.assertSaves(lambda: ModelWithCustomPrimaryKey(custom_primary_key='a', name='foo'), 4)
+        self.assertSaves(lambda: ModelWithCustomPrimaryKey(custom_primary_key='b', name='foo'), 5)
+
+    def test_unique_with_date(self):
+        for model in (ModelWithUniqueSlugDate, ModelWithUniqueSlugMonth, ModelWithUniqueSlugYear,
+                      ModelWithAcceptableEmptyDependency):
+            self.assertSaves(lambda: model(date=self.date, slug='foo'), 2, 3)
+        self.assertSaves(lambda: ModelWithUniqueSlugDay(
+            date=datetime.datetime(2020, 5, 15, 10), slug='foo'), 2, 3)
+        self.assertSaves(lambda: ModelWithAcceptableEmptyDependency(slug='bar'), 2, 3)
+
+    def test_unique_with_fk(self):
+        # the related object is neither fetched nor joined more than needed
+        self.assertSaves(lambda: ModelWithUniqueSlugFK(
+            name='foo', simple_model_id=self.simple_model.pk), 2, 3)
+        self.assertSaves(lambda: ModelWithUniqueSlugFKNull(
+            name='foo', simple_model=self.simple_model), 2, 3)
+        self.assertSaves(lambda: ModelWithUniqueSlugFKNull(name='foo'), 2, 3)
+        self.assertSaves(lambda: ModelWithScopeIndex(
+            slug='foo', date=self.date, simple_model=self.simple_model), 2, 3)
+        self.assertSaves(lambda: ModelWithBooleanInUniqueWith(name='foo', bool=True), 2, 3)
+
+    def test_collision_strategies(self):
+        # the whole family (or window) at once
+        for make in (lambda: ModelWithSingleQueryStrategy(name='foo'),
+                     lambda: ModelWithSingleQueryStrategyMonth(date=self.date, slug='foo'),
+                     lambda: ModelWithLongNameSingleQuery(name='x' * 300),
+                     lambda: ModelWithWindowedStrategy(name='foo')):
+            self.assertSaves(make, 2, 2, 2)
+        # the INSERT alone (in a savepoint as tests run in a transaction); on a
+        # clash, the rejected INSERT, the family and the retried INSERT
+        for make in (lambda: ModelWithOptimisticStrategy(name='foo'),
+                     lambda: ModelWithOptimisticStrategyMonth(date=self.date, slug='foo'),
+                     lambda: ModelWithOptimisticStrategyFK(name='foo',
+                                                           simple_model=self.simple_model)):
+            self.assertSaves(make, 3, 6)
+
+    def test_counter_allocator(self):
+        # the counter is created on the first clash and incremented afterwards
+        # (both in a transaction), then the allocated slug is checked
+        for make in (lambda: ModelWithCounterAllocator(name='foo'),
+                     lambda: ModelWithCounterAllocatorFK(name='foo',
+                                                         simple_model=self.simple_model)):
+            self.assertSaves(make, 2, 9, 7)
+
+    def test_unique_condition(self):
+        self.assertSaves(lambda: ModelWithUniqueCondition(name='foo'), 2, 3)
+        self.assertSaves(lambda: ModelWithUniqueConditionFK(
+            name='foo', simple_model=self.simple_model), 2, 3)
+
+    def test_several_slugs(self):
+        # all fields in one query
+        self.assertSaves(lambda: ModelWithSeveralSlugs(name='foo'), 2, 2)
+
+    def test_resave(self):
+        # the slug is kept without looking up the rivals
+        for make in (lambda: ModelWithUniqueSlug(name='foo'),
+                     lambda: ModelWithUniqueSlugMonth(date=self.date, slug='foo'),
+                     lambda: ModelWithUniqueAutoUpdate(name='foo')):
+            instance = self.assertSaves(make, 2)
+            with self.assertNumQueries(1):
+                instance.save()
+            instance = type(instance).objects.get(pk=instance.pk)
+            with self.assertNumQueries(1):
+                instance.save()
+        # unless the scope depends on another table or the condition
+        for make in (lambda: ModelWithUniqueSlugFK(name='foo', simple_model=self.simple_model),
+                     lambda: ModelWithUniqueCondition(name='foo')):
+            instance = self.assertSaves(make, 2)
+            instance = type(instance).objects.get(pk=instance.pk)
+            with self.assertNumQueries(2):
+                instance.save()
+
+    def test_shared_slug_space(self):
+        # `manager`: the rivals are looked up in the parent table; the child
+        # model inserts into both tables
+        self.assertSaves(lambda: SharedSlugSpace(name='foo'), 2, 3)
+        self.assertSaves(lambda: ModelWithSlugSpaceShared(name='foo'), 5, 6)
+        # `manager_name`: the rivals include the rows hidden by the default manager
+        NonDeletableModelWithUniqueSlug.objects.create(name='foo', is_deleted=True)
+        self.assertSaves(lambda: NonDeletableModelWithUniqueSlug(name='foo'), 3, 4)
+
+    @mock.patch('autoslug.fields.autoslug_modeltranslation_enable', True)
+    def test_modeltranslation(self):
+        field = ModeltranslationTwo._meta.get_field('slug')
+        field._localized_fields = None
+        self.addCleanup(setattr, field, '_localized_fields', None)
+        # one query for all localized slugs, one for the slug, no UPDATE
+        self.assertSaves(lambda: ModeltranslationTwo(title_en='Hello', title_ru='Privet'), 3, 3)
+        self.assertSaves(lambda: ModeltranslationOne(title='hello'), 2, 3)
+
+    def test_bulk_create(self):
+        # one query for the families of all slugs, one INSERT
+        ModelWithUniqueSlug.objects.create(name='foo')
+        with self.assertNumQueries(2):
+            bulk_create(ModelWithUniqueSlug, [ModelWithUniqueSlug(name=name)
+                                              for name in ('foo', 'foo', 'bar')])
@@ -8,7 +8,7 @@
 #  Software Foundation. See the file README for copying conditions.
 #
 from modeltranslation.translator import translator, TranslationOptions
-from .models import ModeltranslationOne
+from .models import ModeltranslationOne, ModeltranslationTwo
 
 
 class ModeltranslationOneTranslation(TranslationOptions):
@@ -17,3 +17,11 @@ class ModeltranslationOneTranslation(TranslationOptions):
 
 translator.register(ModeltranslationOne,
                     ModeltranslationOneTranslation)
+
+
+class ModeltranslationTwoTranslation(TranslationOptions):
+    fields = ('title', 'slug')
+
+
+translator.register(ModeltranslationTwo,
+                    ModeltranslationTwoTranslation)
@@ -9,17 +9,27 @@
 #
 
 # django
+import collections
 import datetime
+import functools
+import hashlib
+import itertools
+import math
+import re
+import threading
+import time
+from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, FieldDoesNotExist
-from django.db.models import ForeignKey
-from django.db.models.fields import DateField
+from django.db.models import ForeignKey, Model, Q, Subquery
+from django.db.models.fields import DateField, DateTimeField
 from django.template.defaultfilters import slugify as django_slugify
-from django.utils.timezone import localtime, is_aware
+from django.utils.timezone import localtime, is_aware, make_aware
 
 try:
     # i18n-friendly approach
     from unidecode import unidecode
 except ImportError:
+    unidecode = None
     try:
         # Cyrillic transliteration (primarily Russian)
         from pytils.translit import slugify
@@ -32,6 +42,182 @@ else:
         return django_slugify(unidecode(value))
 
 
+class SlugifyCache:
+    """
+    A thread-safe bounded LRU cache of slugified values shared by all cached
+    slugify functions (see :func:`cached_slugify`). Entries are keyed by the
+    function and its arguments.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = self.misses = self.evictions = 0
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, func, value, **kwargs):
+        """
+        Returns `func(value, **kwargs)`, computing it only if it is not cached.
+        """
+        key = (func, value, tuple(sorted(kwargs.items())))
+        try:
+            with self._lock:
+                slug = self._data[key]
+                self._data.move_to_end(key)
+                self.hits += 1
+                return slug
+        except KeyError:
+            pass
+        except TypeError:
+            # unhashable value
+            return func(value, **kwargs)
+
+        # computed outside the lock: slugify may be slow and it does not hurt
+        # if two threads happen to compute the same value at once
+        slug = func(value, **kwargs)
+        with self._lock:
+            self.misses += 1
+            self._data[key] = slug
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return slug
+
+    def info(self):
+        """
+        Returns a dict with the numbers of hits, misses and evictions, the
+        current size and the maximum size of the cache.
+        """
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                        size=len(self._data), maxsize=self.maxsize)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+
+class CachedSlugify:
+    """
+    A slugify function memoized in a :class:`SlugifyCache`. The original
+    function is available as `__wrapped__`.
+    """
+    def __init__(self, func, cache):
+        functools.update_wrapper(self, func)
+        self.cache = cache
+
+    def __call__(self, value, **kwargs):
+        return self.cache.get(self.__wrapped__, value, **kwargs)
+
+    def __reduce__(self):
+        # e.g. for worker processes (see slugify_many())
+        return cached_slugify, (self.__wrapped__, self.cache.maxsize)
+
+
+# the cache shared by all cached slugify functions (see cached_slugify())
+slugify_cache = None
+_cached_slugify_functions = {}
+_cached_slugify_lock = threading.Lock()
+
+
+def cached_slugify(func, maxsize):
+    """
+    Returns given slugify function memoized in the shared :data:`slugify_cache`
+    which is created with given maximum size on the first call. The same
+    function always gets the same wrapper.
+    """
+    global slugify_cache
+    with _cached_slugify_lock:
+        if slugify_cache is None:
+            slugify_cache = SlugifyCache(maxsize)
+        if func not in _cached_slugify_functions:
+            _cached_slugify_functions[func] = CachedSlugify(func, slugify_cache)
+        return _cached_slugify_functions[func]
+
+
+def _slugify_chunk(slugify, values):
+    return [slugify(value) for value in values]
+
+
+def slugify_many(values, slugify=None, executor=None, batch_size=10000, chunk_size=500):
+    """
+    Slugifies an iterable of values and yields the slugs in the same order.
+
+    The values are read in batches of `batch_size`, and every distinct value of
+    a batch is slugified only once. If an `executor` is given (e.g. a
+    `concurrent.futures.ProcessPoolExecutor`, which pays off for CPU-heavy
+    functions like the transliterating ones), the distinct values are sent to
+    it in chunks of `chunk_size`; the function must then be picklable.
+
+    :param slugify: the slugify function; defaults to `AUTOSLUG_SLUGIFY_FUNCTION`
+        (see :doc:`settings`).
+
+    .. code-block:: python
+
+        with ProcessPoolExecutor() as executor:
+            for title, slug in zip(titles, slugify_many(titles, executor=executor)):
+                ...
+
+    """
+    if slugify is None:
+        from autoslug.settings import slugify
+
+    values = iter(values)
+    while True:
+        batch = list(itertools.islice(values, batch_size))
+        if not batch:
+            return
+
+        distinct = list(dict.fromkeys(batch))
+        if executor is None:
+            slugs = _slugify_chunk(slugify, distinct)
+        else:
+            chunks = [distinct[start:start + chunk_size]
+                      for start in range(0, len(distinct), chunk_size)]
+            results = executor.map(_slugify_chunk, itertools.repeat(slugify), chunks)
+            slugs = list(itertools.chain.from_iterable(results))
+
+        slugs = dict(zip(distinct, slugs))
+        for value in batch:
+            yield slugs[value]
+
+
+class QueryCounter:
+    """
+    Counts the queries executed on a connection and the seconds spent on them
+    when installed with `connection.execute_wrapper()`.
+    """
+    def __init__(self):
+        self.queries = 0
+        self.time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.time += time.perf_counter() - started
+
+
+def get_slug_index(field, original_slug, slug):
+    """
+    Returns the index of given slug within the family of the original one (1
+    for the original slug itself, see :func:`get_indexed_slug`) or `None` if
+    it does not belong to the family.
+    """
+    if not original_slug or not slug:
+        return None
+    original_slug = crop_slug(field, original_slug)
+    if slug == original_slug:
+        return 1
+    stem, sep, index = slug.rpartition(field.index_sep)
+    if sep and index.isdigit() and original_slug.startswith(stem):
+        return int(index)
+    return None
+
+
 def get_prepopulated_value(field, instance):
     """
     Returns preliminary value based on `populate_from`.
@@ -51,86 +237,345 @@ def generate_unique_slug(field, instance, slug, manager):
     instance can be found with such slug. If ``unique_with`` (a tuple of field
     names) was specified for the field, all these fields are included together
     in the query when looking for a "rival" model instance.
+
+    The way the rivals are looked up depends on the `collision_strategy` of
+    the field (see :data:`COLLISION_STRATEGIES`) unless the field has an
+    `allocator` (see :mod:`autoslug.allocators`).
     """
 
-    original_slug = slug = crop_slug(field, slug)
+    original_slug = crop_slug(field, slug)
 
-    default_lookups = tuple(get_uniqueness_lookups(field, instance, field.unique_with))
+    default_lookups = tuple(get_uniqueness_lookups(field, instance))
 
-    index = 1
+    if not manager:
+        manager = field.model._default_manager
+
+    rivals = get_rivals(field, manager, default_lookups)
+    if instance.pk:
+        rivals = rivals.exclude(pk=instance.pk)
+
+    allocator = field.get_allocator()
+    if allocator is not None:
+        return allocator.allocate(field, rivals, original_slug, default_lookups, instance)
+
+    resolve = COLLISION_STRATEGIES[field.collision_strategy]
+    return resolve(field, rivals, original_slug)
 
+
+def get_rivals(field, manager, lookups):
+    """
+    Returns the queryset of objects whose slugs given field must not clash
+    with: the ones within the scope described by given lookups (see
+    :func:`get_uniqueness_lookups`) which match the `unique_condition`.
+    """
+    rivals = manager.filter(**dict(lookups))
+    if field.unique_condition is not None:
+        rivals = rivals.filter(field.unique_condition)
+    return rivals
+
+
+def generate_localized_slugs(field, instance, localized_slugs, manager):
+    """
+    Returns unique slugs for the localized versions of given field (see
+    :meth:`~autoslug.fields.AutoSlugField.get_localized_fields`) of given
+    instance. `localized_slugs` is a list of `(localized_field, slug)` pairs;
+    the rivals are those of the field itself (see
+    :func:`generate_slugs_together`).
+    """
     if not manager:
         manager = field.model._default_manager
 
+    rivals = get_rivals(field, manager, tuple(get_uniqueness_lookups(field, instance)))
+    if instance.pk:
+        rivals = rivals.exclude(pk=instance.pk)
+    return generate_slugs_together(rivals, localized_slugs)
 
-    # keep changing the slug until it is unique
-    while True:
-        # find instances with same slug
-        lookups = dict(default_lookups, **{field.name: slug})
-        rivals = manager.filter(**lookups)
-        if instance.pk:
-            rivals = rivals.exclude(pk=instance.pk)
 
-        if not rivals:
+def generate_slugs_together(rivals, field_slugs):
+    """
+    Returns unique slugs for several slug fields of one object which share
+    given rivals. `field_slugs` is a list of `(field, slug)` pairs; each slug is
+    made unique among the values of its own column. The taken slugs of all
+    fields are fetched with one query. Empty slugs are left intact.
+    """
+    digits = SINGLE_QUERY_DIGITS
+    originals = [(field, crop_slug(field, slug) if slug else slug)
+                 for field, slug in field_slugs]
+    conditions = Q()
+    for field, original_slug in originals:
+        if original_slug:
+            conditions |= get_slug_family_filter(field, original_slug, digits)
+    if not conditions:
+        return [slug for field, slug in originals]
+
+    names = [field.attname for field, original_slug in originals]
+    rows = list(rivals.filter(conditions).values_list(*names))
+
+    result = []
+    for position, (field, original_slug) in enumerate(originals):
+        if not original_slug:
+            result.append(original_slug)
+            continue
+        taken = {row[position] for row in rows}
+        slug = find_free_slug(field, original_slug, taken, stop=10 ** digits)
+        if slug is None:
+            # all indices with given number of digits are taken (rare)
+            slug = _resolve_single_query(field, rivals, original_slug)
+        result.append(slug)
+    return result
+
+
+def get_indexed_slug(field, original_slug, index):
+    """
+    Returns the candidate slug with given index, e.g. "foo-2" for "foo" and 2.
+    The first index is the original slug itself. The slug is cropped so that
+    the result fits into the field.
+    """
+    if index == 1:
+        return original_slug
+
+    # ensure the resulting string is not too long
+    tail_length = len(field.index_sep) + len(str(index))
+    combined_length = len(original_slug) + tail_length
+    if field.max_length < combined_length:
+        original_slug = original_slug[:field.max_length - tail_length]
+
+    data = dict(slug=original_slug, sep=field.index_sep, index=index)
+    return '%(slug)s%(sep)s%(index)d' % data
+
+
+def find_free_index(field, original_slug, taken, start=1, stop=None):
+    """
+    Returns the first index of a candidate slug (see :func:`get_indexed_slug`)
+    that is not in the `taken` set, or `None` if all candidates below `stop`
+    are taken.
+    """
+    index = start
+    while stop is None or index < stop:
+        if get_indexed_slug(field, original_slug, index) not in taken:
+            return index
+        index += 1
+    return None
+
+
+def find_free_slug(field, original_slug, taken, start=1, stop=None):
+    """
+    Returns the first candidate slug (see :func:`get_indexed_slug`) that is not
+    in the `taken` set, or `None` if all candidates below `stop` are taken.
+    """
+    index = find_free_index(field, original_slug, taken, start, stop)
+    if index is None:
+        return None
+    return get_indexed_slug(field, original_slug, index)
+
+
+def get_scope_key(lookups):
+    """
+    Returns a short stable string identifying the uniqueness scope described
+    by given lookups (see :func:`get_uniqueness_lookups`).
+    """
+    parts = []
+    for name, value in sorted(lookups, key=lambda lookup: lookup[0]):
+        if isinstance(value, Model):
+            value = value.pk
+        parts.append('%s=%r' % (name, value))
+    return hashlib.sha1('&'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_slug_family_filter(field, original_slug, digits):
+    """
+    Returns a `Q` object matching the original slug and every candidate derived
+    from it with an index of up to `digits` digits.
+    """
+    stem_length = max(field.max_length - len(field.index_sep) - digits, 0)
+    if len(original_slug) <= stem_length:
+        # no cropping: the family is "foo" and "foo-<digits>"; the prefix lets
+        # the database use an index, the pattern leaves out e.g. "foo-bar"
+        prefix = original_slug + field.index_sep
+        return (Q(**{field.name: original_slug}) |
+                Q(**{field.name + '__startswith': prefix,
+                     field.name + '__regex': r'^%s[0-9]+$' % re.escape(prefix)}))
+    # long slugs are cropped to make room for the index, so all we can rely on
+    # is the shortest common prefix
+    return Q(**{field.name + '__startswith': original_slug[:stem_length]})
+
+
+def get_taken_slugs(field, rivals, original_slugs, digits):
+    """
+    Returns the set of slugs used by given rivals within the families (see
+    :func:`get_slug_family_filter`) of given original slugs.
+    """
+    original_slugs = sorted(set(original_slugs))
+    taken = set()
+    for start in range(0, len(original_slugs), FAMILY_BATCH_SIZE):
+        conditions = Q()
+        for original_slug in original_slugs[start:start + FAMILY_BATCH_SIZE]:
+            conditions |= get_slug_family_filter(field, original_slug, digits)
+        taken.update(rivals.filter(conditions).values_list(field.attname, flat=True))
+    return taken
+
+
+def generate_unique_slugs(field, instances, slugs, manager):
+    """
+    Bulk counterpart of :func:`generate_unique_slug`. Returns the list of
+    unique slugs for given instances and their (already slugified) values.
+
+    Instances are grouped by their ``unique_with`` lookups and existing slugs
+    are fetched with one query per group. Name clashes with existing objects
+    and within the batch itself are resolved in memory, the lowest free index
+    wins (just like with consecutive saves). Empty slugs are left intact.
+    """
+    if not manager:
+        manager = field.model._default_manager
+
+    # the objects being (re)populated are going to replace their own slugs
+    pks = [instance.pk for instance in instances if instance.pk is not None]
+
+    groups = {}
+    for position, (instance, slug) in enumerate(zip(instances, slugs)):
+        if slug:
+            lookups = tuple(get_uniqueness_lookups(field, instance))
+            groups.setdefault(lookups, []).append(position)
+
+    result = list(slugs)
+    for lookups, positions in groups.items():
+        rivals = get_rivals(field, manager, lookups)
+        if pks:
+            rivals = rivals.exclude(pk__in=pks)
+
+        original_slugs = [crop_slug(field, slugs[position]) for position in positions]
+        digits = SINGLE_QUERY_DIGITS
+        taken = get_taken_slugs(field, rivals, original_slugs, digits)
+        # `taken` only grows, so the indices below the last one given to an
+        # original slug need not be tried again
+        starts = {}
+
+        for position, original_slug in zip(positions, original_slugs):
+            start = starts.get(original_slug, 1)
+            index = find_free_index(field, original_slug, taken, start, 10 ** digits)
+            while index is None:
+                # all indices with given number of digits are taken (rare)
+                digits += 1
+                taken.update(get_taken_slugs(field, rivals, [original_slug], digits))
+                index = find_free_index(field, original_slug, taken, start, 10 ** digits)
+            starts[original_slug] = index + 1
+            slug = get_indexed_slug(field, original_slug, index)
+            taken.add(slug)
+            result[position] = slug
+
+    return result
+
+
+def _resolve_linear(field, rivals, original_slug):
+    # probe the candidates one by one
+    index = 1
+    while True:
+        slug = get_indexed_slug(field, original_slug, index)
+        if not rivals.filter(**{field.name: slug}).exists():
             # the slug is unique, no model uses it
             return slug
-
-        # the slug is not unique; change once more
         index += 1
 
-        # ensure the resulting string is not too long
-        tail_length = len(field.index_sep) + len(str(index))
-        combined_length = len(original_slug) + tail_length
-        if field.max_length < combined_length:
-            original_slug = original_slug[:field.max_length - tail_length]
 
-        # re-generate the slug
-        data = dict(slug=original_slug, sep=field.index_sep, index=index)
-        slug = '%(slug)s%(sep)s%(index)d' % data
+def _resolve_single_query(field, rivals, original_slug):
+    # fetch the slugs of the whole family at once and pick the first free one
+    # in Python; this only needs another query if all indices with given number
+    # of digits are taken
+    digits = SINGLE_QUERY_DIGITS
+    while True:
+        taken = get_taken_slugs(field, rivals, [original_slug], digits)
+        slug = find_free_slug(field, original_slug, taken, stop=10 ** digits)
+        if slug is not None:
+            return slug
+        digits += 1
+
 
-        # ...next iteration...
+def _resolve_windowed(field, rivals, original_slug):
+    # check a window of candidates with one "IN" query; if the whole window
+    # is taken, try the next one, growing it geometrically
+    start, size = 1, field.window_size
+    while True:
+        candidates = [get_indexed_slug(field, original_slug, index)
+                      for index in range(start, start + size)]
+        lookups = {field.name + '__in': candidates}
+        taken = set(rivals.filter(**lookups).values_list(field.attname, flat=True))
+        for slug in candidates:
+            if slug not in taken:
+                return slug
+        start += size
+        size = get_next_window_size(field, size)
 
 
-def get_uniqueness_lookups(field, instance, unique_with):
+def get_next_window_size(field, size):
     """
-    Returns a dict'able tuple of lookups to ensure uniqueness of a slug.
+    Returns the size of the window following one of given size in the
+    ``'windowed'`` strategy. It grows by at least one candidate, so a small
+    `window_growth` is not truncated away, and stays within
+    :data:`MAX_WINDOW_SIZE`.
+    """
+    return min(max(size + 1, math.ceil(size * field.window_growth)), MAX_WINDOW_SIZE)
+
+
+# upper bound for the number of candidates in one query of the "windowed"
+# strategy (some backends limit the number of query parameters)
+MAX_WINDOW_SIZE = 500
+
+# number of slug families combined in one query when fetching taken slugs
+FAMILY_BATCH_SIZE = 200
+
+# number of index digits covered by the first query of the "single_query"
+# strategy; affects only the prefix used for very long (cropped) slugs
+SINGLE_QUERY_DIGITS = 3
+
+COLLISION_STRATEGIES = {
+    # one query per candidate: "foo", "foo-2", "foo-3", etc.
+    'linear': _resolve_linear,
+    # one query fetching all existing "foo" and "foo-<n>" slugs
+    'single_query': _resolve_single_query,
+    # one "IN" query per window of candidates, windows grow geometrically
+    'windowed': _resolve_windowed,
+    # no query unless the database has rejected the slug, then "single_query"
+    'optimistic': _resolve_single_query,
+}
+
+
+DATE_PARTS = ('year', 'month', 'day')
+
+#: A compiled ``unique_with`` entry (see :func:`compile_uniqueness_lookups`).
+#: `date_parts` is the tuple of date parts to compare for date fields (e.g.
+#: ``('year', 'month')`` for "pub_date__month") and `inner_lookup` is the rest
+#: of the path for lookups through a relation (e.g. "name" for "author__name").
+UniquenessLookup = collections.namedtuple(
+    'UniquenessLookup', 'lookup name field is_relation date_parts inner_lookup')
+
+
+def compile_uniqueness_lookups(field, model, unique_with):
+    """
+    Resolves the ``unique_with`` entries of given field against given model
+    and returns them as a tuple of :data:`UniquenessLookup`, so that saving an
+    instance only needs to read the values. Raises `ValueError` if an entry
+    is invalid.
     """
+    opts = model._meta
+    plan = []
     for original_lookup_name in unique_with:
-        if '__' in original_lookup_name:
-            field_name, inner_lookup = original_lookup_name.split('__', 1)
-        else:
-            field_name, inner_lookup = original_lookup_name, None
+        field_name, _, inner_lookup = original_lookup_name.partition('__')
 
         try:
-            other_field = instance._meta.get_field(field_name)
+            other_field = opts.get_field(field_name)
         except FieldDoesNotExist:
             raise ValueError('Could not find attribute %s.%s referenced'
                              ' by %s.%s (see constraint `unique_with`)'
-                             % (instance._meta.object_name, field_name,
-                                instance._meta.object_name, field.name))
+                             % (opts.object_name, field_name,
+                                opts.object_name, field.name))
 
         if field == other_field:
             raise ValueError('Attribute %s.%s references itself in `unique_with`.'
                              ' Please use "unique=True" for this case.'
-                             % (instance._meta.object_name, field_name))
+                             % (opts.object_name, field_name))
 
-        value = getattr(instance, field_name)
-        if value is not False and not value:
-            if other_field.blank:
-                field_object = instance._meta.get_field(field_name)
-                if isinstance(field_object, ForeignKey):
-                    lookup = '%s__isnull' % field_name
-                    yield lookup, True
-                break
-            raise ValueError('Could not check uniqueness of %s.%s with'
-                             ' respect to %s.%s because the latter is empty.'
-                             ' Please ensure that "%s" is declared *after*'
-                             ' all fields listed in unique_with.'
-                             % (instance._meta.object_name, field.name,
-                                instance._meta.object_name, field_name,
-                                field.name))
-        if isinstance(value, datetime.datetime) and is_aware(value):
-            value = localtime(value)
+        is_relation = isinstance(other_field, ForeignKey)
+        date_parts = ()
         if isinstance(other_field, DateField):    # DateTimeField is a DateField subclass
             inner_lookup = inner_lookup or 'day'
 
@@ -139,29 +584,127 @@ def get_uniqueness_lookups(field, instance, unique_with):
                                  ' is set to "%s", but AutoSlugField only'
                                  ' accepts one level of nesting for dates'
                                  ' (e.g. "date__month").'
-                                 % (instance._meta.object_name, field.name,
+                                 % (opts.object_name, field.name,
                                     original_lookup_name))
 
-            parts = ['year', 'month', 'day']
             try:
-                granularity = parts.index(inner_lookup) + 1
+                granularity = DATE_PARTS.index(inner_lookup) + 1
             except ValueError:
                 raise ValueError('expected one of %s, got "%s" in "%s"'
-                                    % (parts, inner_lookup, original_lookup_name))
-            else:
-                for part in parts[:granularity]:
-                    lookup = f'{field_name}__{part}'
-                    yield lookup, getattr(value, part)
+                                    % (list(DATE_PARTS), inner_lookup, original_lookup_name))
+            date_parts = DATE_PARTS[:granularity]
+            inner_lookup = None
+        elif inner_lookup and not is_relation:
+            raise ValueError('Could not resolve lookup "%s" in `unique_with` of %s.%s'
+                             % (original_lookup_name, opts.object_name, field.name))
+
+        plan.append(UniquenessLookup(original_lookup_name, field_name, other_field,
+                                     is_relation, date_parts, inner_lookup or None))
+    return tuple(plan)
+
+
+class RelatedValue(collections.namedtuple('RelatedValue', 'model key value lookup')):
+    """
+    The value of a ``unique_with`` lookup through a relation (e.g. the name of
+    the author for ``unique_with='author__name'``), identified by the key of
+    the related object. It is compared with a subquery in the query of rivals,
+    so the related object is never loaded.
+    """
+    __slots__ = ()
+
+    def resolve_expression(self, *args, **kwargs):
+        queryset = self.model._base_manager.filter(**{self.key: self.value}).values(self.lookup)
+        return Subquery(queryset).resolve_expression(*args, **kwargs)
+
+    def __repr__(self):
+        # stable across processes (see get_scope_key())
+        return 'RelatedValue(%s, %s=%r, %r)' % (self.model._meta.label_lower,
+                                                self.key, self.value, self.lookup)
+
+
+def get_date_range(field, value, part):
+    """
+    Returns the half-open range ``(start, end)`` of the year, month or day
+    (depending on `part`) which given date or datetime falls into, with the
+    bounds as values of given date field. Aware datetimes are converted to the
+    current time zone first. `end` is `None` after the last representable date.
+    """
+    if isinstance(value, datetime.datetime):
+        if is_aware(value):
+            value = localtime(value)
+        value = value.date()
+
+    if part == 'year':
+        start = datetime.date(value.year, 1, 1)
+    elif part == 'month':
+        start = datetime.date(value.year, value.month, 1)
+    else:
+        start = value
+
+    try:
+        if part == 'year':
+            end = start.replace(year=start.year + 1)
+        elif part == 'month':
+            end = (start + datetime.timedelta(days=31)).replace(day=1)
         else:
-            # TODO: this part should be documented as it involves recursion
-            if inner_lookup:
-                if not hasattr(value, '_meta'):
-                    raise ValueError('Could not resolve lookup "%s" in `unique_with` of %s.%s'
-                                     % (original_lookup_name, instance._meta.object_name, field.name))
-                for inner_name, inner_value in get_uniqueness_lookups(field, value, [inner_lookup]):
-                    yield original_lookup_name, inner_value
-            else:
-                yield field_name, value
+            end = start + datetime.timedelta(days=1)
+    except (ValueError, OverflowError):
+        end = None
+
+    if isinstance(field, DateTimeField):
+        def to_datetime(date):
+            result = datetime.datetime.combine(date, datetime.time())
+            return make_aware(result) if settings.USE_TZ else result
+        start = to_datetime(start)
+        end = end and to_datetime(end)
+    return start, end
+
+
+def get_uniqueness_lookups(field, instance, unique_with=None):
+    """
+    Returns a dict'able tuple of lookups to ensure uniqueness of a slug.
+
+    The ``unique_with`` entries of the field are compiled once per field (see
+    :meth:`~autoslug.fields.AutoSlugField.get_uniqueness_plan`). Related
+    objects are never fetched: foreign keys are compared by their key and
+    lookups through them by a subquery (see :class:`RelatedValue`).
+    """
+    if unique_with is None or unique_with == field.unique_with:
+        plan = field.get_uniqueness_plan()
+    else:
+        plan = compile_uniqueness_lookups(field, type(instance), unique_with)
+
+    for lookup in plan:
+        if lookup.is_relation:
+            # the key is enough, don't fetch the related object
+            value = getattr(instance, lookup.field.attname)
+        else:
+            value = getattr(instance, lookup.name)
+        if value is not False and not value:
+            if lookup.field.blank:
+                if lookup.is_relation:
+                    yield '%s__isnull' % lookup.name, True
+                break
+            opts = instance._meta
+            raise ValueError('Could not check uniqueness of %s.%s with'
+                             ' respect to %s.%s because the latter is empty.'
+                             ' Please ensure that "%s" is declared *after*'
+                             ' all fields listed in unique_with.'
+                             % (opts.object_name, field.name,
+                                opts.object_name, lookup.name,
+                                field.name))
+        if lookup.date_parts:
+            # a range (unlike e.g. "date__month") can use an index on the column
+            start, end = get_date_range(lookup.field, value, lookup.date_parts[-1])
+            yield f'{lookup.name}__gte', start
+            if end is not None:
+                yield f'{lookup.name}__lt', end
+        elif lookup.inner_lookup:
+            yield lookup.lookup, RelatedValue(lookup.field.related_model,
+                                              lookup.field.target_field.attname,
+                                              value, lookup.inner_lookup)
+        else:
+            yield lookup.name, value
 
 
 def crop_slug(field, slug):
@@ -170,33 +713,112 @@ def crop_slug(field, slug):
     return slug
 
 
+if unidecode is not None:
+    _WHITESPACE_RE = re.compile(r'\s')
+    _NON_SLUG_RE = re.compile(r'[^-\w]')
+
+    def _slug_chars(value):
+        """
+        Returns what is left of a string of ASCII characters in a slug before
+        the separators are collapsed: lowercase letters, digits, underscores
+        and dashes (whitespace becomes a dash, everything else is removed).
+        """
+        return _NON_SLUG_RE.sub('', _WHITESPACE_RE.sub('-', value.lower()))
+
+    class _TransliterationTable(dict):
+        """
+        A `str.translate()` table mapping any character to its contribution to
+        the slug. The entries are computed from the Unidecode data one block
+        of 256 code points at a time, when a character of the block is first
+        met.
+        """
+        def __missing__(self, codepoint):
+            start = codepoint & ~0xff
+            for other in range(start, start + 0x100):
+                if other not in self:
+                    self[other] = _slug_chars(unidecode(chr(other)))
+            return self[codepoint]
+
+    _ASCII_SLUG_TABLE = {codepoint: _slug_chars(chr(codepoint)) or None
+                         for codepoint in range(0x80)}
+    _SLUG_TABLE = _TransliterationTable(_ASCII_SLUG_TABLE)
+    _SEPARATORS_RE = re.compile('-{2,}')
+
+    def fast_slugify(value, max_length=None):
+        """
+        Returns the same slug as the default :func:`slugify` (i.e. Django's
+        `slugify()` over Unidecode) in one pass over precompiled translation
+        tables; plain ASCII values skip transliteration altogether.
+
+        If `max_length` is given, the slug is cropped to it without leaving a
+        dash or an underscore at the end, so that `AutoSlugField` does not need
+        to slugify the cropped value again.
+        """
+        value = str(value)
+        if value.isascii():
+            slug = value.translate(_ASCII_SLUG_TABLE)
+        else:
+            slug = value.translate(_SLUG_TABLE)
+        if '--' in slug:
+            slug = _SEPARATORS_RE.sub('-', slug)
+        slug = slug.strip('-_')
+        if max_length is not None and max_length < len(slug):
+            slug = slug[:max_length].rstrip('-_')
+        return slug
+
+    # AutoSlugField passes max_length to functions with this flag
+    fast_slugify.accepts_max_length = True
+
+
 try:
     import translitcodec
 except ImportError:
     pass
 else:
-    import re
+    import codecs
     PUNCT_RE = re.compile(r'[\t !"#$%&\'()*\-/<=>?@\[\\\]^_`{|},.]+')
 
-    def translitcodec_slugify(codec):
-        def _slugify(value, delim='-', encoding=''):
-            """
-            Generates an ASCII-only slug.
+    class TranslitSlugifier:
+        """
+        Generates an ASCII-only slug with the given translitcodec codec.
 
-            Borrowed from http://flask.pocoo.org/snippets/5/
-            """
+        The codec is looked up once (per `encoding`) and applied to the whole
+        value in a single call; the result is then split on punctuation and
+        joined with `delim`.
+
+        Borrowed from http://flask.pocoo.org/snippets/5/
+        """
+        def __init__(self, codec):
+            self.codec = codec
+            self.encoders = {'': codecs.getencoder(codec)}
+
+        def __call__(self, value, delim='-', encoding=''):
+            try:
+                encode = self.encoders[encoding]
+            except KeyError:
+                encode = self.encoders[encoding] = codecs.getencoder(f"{self.codec}/{encoding}")
             if encoding:
-                encoder = f"{codec}/{encoding}"
+                # characters the codec can't transliterate are dropped
+                text = encode(value.lower(), 'ignore')[0].decode(encoding)
             else:
-                encoder = codec
-            result = []
-            for word in PUNCT_RE.split(value.lower()):
-                word = word.encode(encoder)
-                if word:
-                    result.append(word)
-            return unicode(delim.join(result))
-        return _slugify
+                text = encode(value.lower())[0]
+            return delim.join(word for word in PUNCT_RE.split(text) if word)
+
+        def __reduce__(self):
+            # the encoder cache is rebuilt in worker processes
+            return TranslitSlugifier, (self.codec,)
+
+        def __repr__(self):
+            return f"<TranslitSlugifier {self.codec!r}>"
+
+    def translitcodec_slugify(codec):
+        return TranslitSlugifier(codec)
 
     translit_long = translitcodec_slugify("translit/long")
     translit_short = translitcodec_slugify("translit/short")
     translit_one = translitcodec_slugify("translit/one")
+
+    # batch entry points (see slugify_many())
+    translit_long_many = functools.partial(slugify_many, slugify=translit_long)
+    translit_short_many = functools.partial(slugify_many, slugify=translit_short)
+    translit_one_many = functools.partial(slugify_many, slugify=translit_one)
@@ -0,0 +1,21 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Benchmarks of slug generation using the test models on SQLite, both in memory
+and on disk. Run them from the root of the repository::
+
+    python -m benchmarks --save before
+    # ...change something...
+    python -m benchmarks --save after --compare before
+
+The results are stored as JSON in ``benchmarks/results/``. See
+``python -m benchmarks --help`` for selecting the cases and the number of
+repetitions.
+"""
@@ -0,0 +1,143 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+Benchmark runner, see :mod:`benchmarks`.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+
+import django
+from django.conf import settings
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+def configure(disk_path):
+    settings.configure(
+        USE_TZ=False,
+        INSTALLED_APPS=[
+            'autoslug',
+            'autoslug.counters',
+        ],
+        DATABASES={
+            'default': dict(ENGINE='django.db.backends.sqlite3', NAME=':memory:'),
+            'disk': dict(ENGINE='django.db.backends.sqlite3', NAME=disk_path),
+        },
+        DATABASE_ROUTERS=['benchmarks.cases.DatabaseRouter'],
+        # some test models have a broken `unique_with` on purpose
+        SILENCED_SYSTEM_CHECKS=['autoslug.E001'],
+    )
+    django.setup()
+
+
+def summarize(durations):
+    durations = sorted(durations)
+    return dict(
+        n=len(durations),
+        min=durations[0],
+        median=statistics.median(durations),
+        mean=statistics.mean(durations),
+        p95=durations[math.ceil(0.95 * len(durations)) - 1],
+    )
+
+
+def get_environment():
+    return dict(
+        python=platform.python_version(),
+        django=django.get_version(),
+        sqlite=sqlite3.sqlite_version,
+        platform=platform.platform(),
+    )
+
+
+def get_results_path(name):
+    if os.sep in name or name.endswith('.json'):
+        return name
+    return os.path.join(RESULTS_DIR, name + '.json')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description='Benchmarks slug generation.')
+    parser.add_argument('--repeat', type=int, default=50,
+                        help='number of measured runs per case')
+    parser.add_argument('--corpus-size', type=int, default=1000,
+                        help='number of titles in the synthetic corpus')
+    parser.add_argument('--databases', nargs='+', choices=('memory', 'disk'),
+                        default=['memory', 'disk'], help='SQLite databases to use')
+    parser.add_argument('--filter', action='append', default=[],
+                        help='only run the cases whose names contain this'
+                             ' (may be repeated)')
+    parser.add_argument('--save', metavar='NAME',
+                        help='store the results in benchmarks/results/NAME.json')
+    parser.add_argument('--compare', metavar='NAME',
+                        help='compare the medians with stored results')
+    parser.add_argument('--list', action='store_true', help='only list the cases')
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(get_results_path(args.compare)) as f:
+            baseline = json.load(f)['results']
+
+    tmpdir = tempfile.mkdtemp(prefix='autoslug-benchmarks-')
+    try:
+        configure(os.path.join(tmpdir, 'db.sqlite3'))
+
+        from benchmarks.cases import create_tables, get_cases
+        from benchmarks.corpus import zipf_titles
+
+        databases = {label: alias for label, alias in
+                     (('memory', 'default'), ('disk', 'disk')) if label in args.databases}
+        cases = get_cases(databases, zipf_titles(args.corpus_size))
+        if args.filter:
+            cases = [(name, case) for name, case in cases
+                     if any(part in name for part in args.filter)]
+        if args.list:
+            for name, case in cases:
+                print(name)
+            return
+
+        for alias in databases.values():
+            create_tables(alias)
+
+        results = {}
+        print('%-72s %6s %10s %10s %8s' % ('case', 'runs', 'median ms', 'p95 ms', 'change'))
+        for name, case in cases:
+            result = results[name] = summarize(case(args.repeat))
+            change = ''
+            if baseline and name in baseline:
+                change = '%+.1f%%' % (100 * (result['median'] / baseline[name]['median'] - 1))
+            print('%-72s %6d %10.3f %10.3f %8s' % (
+                name, result['n'], result['median'] * 1000, result['p95'] * 1000, change))
+            sys.stdout.flush()
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if args.save:
+        path = get_results_path(args.save)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(dict(environment=get_environment(), repeat=args.repeat,
+                           corpus_size=args.corpus_size, results=results), f, indent=2)
+        print('Results saved to %s' % path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+The benchmark cases. Each case is a function that prepares the database and
+returns the list of measured durations (in seconds) of given number of runs.
+Django must be set up before importing this module (see ``__main__.py``).
+"""
+import contextlib
+import datetime
+import functools
+import io
+import time
+
+# django
+from django.core.management import call_command
+from django.utils.module_loading import import_string
+
+# this app
+from autoslug import bulk_create
+from autoslug.counters.models import SlugCounter
+from autoslug.tests.models import (
+    SimpleModel,
+    ModelWithUniqueSlug, ModelWithSingleQueryStrategy, ModelWithWindowedStrategy,
+    ModelWithOptimisticStrategy, ModelWithCounterAllocator, ModelWithCacheAllocator,
+    ModelWithUniqueSlugMonth, ModelWithSingleQueryStrategyMonth,
+    ModelWithOptimisticStrategyMonth,
+    ModelWithUniqueSlugFK, ModelWithOptimisticStrategyFK, ModelWithCounterAllocatorFK,
+)
+
+
+# numbers of rows with the same base slug that exist before the measured saves
+DUPLICATES = (0, 10, 1000)
+
+# models without `unique_with`, one per collision strategy or allocator
+STRATEGY_MODELS = (
+    ModelWithUniqueSlug, ModelWithSingleQueryStrategy, ModelWithWindowedStrategy,
+    ModelWithOptimisticStrategy, ModelWithCounterAllocator, ModelWithCacheAllocator,
+)
+
+# models with ``unique_with='date__month'``
+DATE_SCOPE_MODELS = (
+    ModelWithUniqueSlugMonth, ModelWithSingleQueryStrategyMonth,
+    ModelWithOptimisticStrategyMonth,
+)
+
+# models with `unique_with` through a foreign key
+FK_SCOPE_MODELS = (
+    ModelWithUniqueSlugFK, ModelWithOptimisticStrategyFK, ModelWithCounterAllocatorFK,
+)
+
+# slugify functions shipped with django-autoslug or supported by it; the ones
+# with missing dependencies are skipped
+SLUGIFY_FUNCTIONS = (
+    'autoslug.utils.slugify',
+    'autoslug.utils.fast_slugify',
+    'autoslug.utils.translit_long',
+    'autoslug.utils.translit_short',
+    'autoslug.utils.translit_one',
+    'django.template.defaultfilters.slugify',
+    'pytils.translit.slugify',
+)
+
+DATE = datetime.date(2020, 5, 15)
+OTHER_DATE = datetime.date(2020, 6, 15)
+
+
+class DatabaseRouter:
+    """
+    Routes all queries to the database being benchmarked.
+    """
+    alias = 'default'
+
+    def db_for_read(self, model, **hints):
+        return DatabaseRouter.alias
+
+    db_for_write = db_for_read
+
+
+@contextlib.contextmanager
+def using(alias):
+    previous, DatabaseRouter.alias = DatabaseRouter.alias, alias
+    try:
+        yield
+    finally:
+        DatabaseRouter.alias = previous
+
+
+def create_tables(alias):
+    call_command('migrate', run_syncdb=True, database=alias, verbosity=0)
+
+
+def clear(*models):
+    for model in models:
+        model._base_manager.all().delete()
+    SlugCounter.objects.all().delete()
+
+
+def add_rows(model, count, **values):
+    """
+    Inserts `count` rows with given values, i.e. with clashing slugs "foo",
+    "foo-2", etc.
+    """
+    if count:
+        bulk_create(model, [model(**values) for _ in range(count)])
+    if model in (ModelWithCounterAllocator, ModelWithCounterAllocatorFK):
+        call_command('autoslug_seed_counters', model._meta.label, stdout=io.StringIO())
+
+
+def time_saves(make, repeat):
+    """
+    Measures saving `repeat` new instances returned by `make()`. Each one is
+    deleted afterwards so they all face the same clashes.
+    """
+    make().save()    # warm up, e.g. catch up the allocators
+    durations = []
+    for _ in range(repeat):
+        instance = make()
+        started = time.perf_counter()
+        instance.save()
+        durations.append(time.perf_counter() - started)
+        instance.delete()
+    return durations
+
+
+def save_with_duplicates(model, count, repeat):
+    clear(model)
+    add_rows(model, count, name='foo')
+    return time_saves(lambda: model(name='foo'), repeat)
+
+
+def save_in_date_scope(model, count, repeat):
+    # as many clashing slugs in another month, which must not matter
+    clear(model)
+    add_rows(model, count, date=DATE, slug='foo')
+    add_rows(model, count, date=OTHER_DATE, slug='foo')
+    return time_saves(lambda: model(date=DATE, slug='foo'), repeat)
+
+
+def save_in_fk_scope(model, count, repeat):
+    clear(model, SimpleModel)
+    scope = SimpleModel.objects.create(name='scope')
+    other = SimpleModel.objects.create(name='other')
+    add_rows(model, count, name='foo', simple_model=scope)
+    add_rows(model, count, name='foo', simple_model=other)
+    return time_saves(lambda: model(name='foo', simple_model=scope), repeat)
+
+
+def save_corpus(model, corpus, repeat):
+    """
+    Measures saving each title of the corpus once (`repeat` is ignored).
+    """
+    clear(model)
+    durations = []
+    for title in corpus:
+        instance = model(name=title)
+        started = time.perf_counter()
+        instance.save()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def bulk_create_corpus(model, corpus, repeat):
+    durations = []
+    for _ in range(repeat):
+        clear(model)
+        instances = [model(name=title) for title in corpus]
+        started = time.perf_counter()
+        bulk_create(model, instances)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def slugify_corpus(slugify, corpus, repeat):
+    for title in corpus:    # warm up, e.g. build the lookup tables
+        slugify(title)
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for title in corpus:
+            slugify(title)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def in_database(alias, case):
+    @functools.wraps(case)
+    def run(repeat):
+        with using(alias):
+            return case(repeat)
+    return run
+
+
+def get_cases(databases, corpus):
+    """
+    Returns a list of `(name, case)` pairs where `case(repeat)` returns the
+    list of measured durations. `databases` maps labels (used in the names) to
+    database aliases.
+    """
+    cases = []
+    for path in SLUGIFY_FUNCTIONS:
+        try:
+            slugify = import_string(path)
+        except ImportError:
+            continue
+        cases.append(('slugify/%s' % path, functools.partial(slugify_corpus, slugify, corpus)))
+
+    for label, alias in databases.items():
+        db_cases = []
+        for model in STRATEGY_MODELS:
+            for count in DUPLICATES:
+                db_cases.append(('save/%s/duplicates=%d' % (model.__name__, count),
+                                 functools.partial(save_with_duplicates, model, count)))
+        for model in DATE_SCOPE_MODELS:
+            for count in DUPLICATES:
+                db_cases.append(('save-date-scope/%s/duplicates=%d' % (model.__name__, count),
+                                 functools.partial(save_in_date_scope, model, count)))
+        for model in FK_SCOPE_MODELS:
+            for count in DUPLICATES:
+                db_cases.append(('save-fk-scope/%s/duplicates=%d' % (model.__name__, count),
+                                 functools.partial(save_in_fk_scope, model, count)))
+        for model in STRATEGY_MODELS:
+            db_cases.append(('save-corpus/%s' % model.__name__,
+                             functools.partial(save_corpus, model, corpus)))
+        db_cases.append(('bulk-create-corpus/%s' % ModelWithUniqueSlug.__name__,
+                         functools.partial(bulk_create_corpus, ModelWithUniqueSlug, corpus)))
+
+        cases.extend(('%s/%s' % (label, name), in_database(alias, case))
+                     for name, case in db_cases)
+    return cases
@@ -0,0 +1,56 @@
+#  Copyright (c) 2018-present Justin Mayer
+#  Copyright (c) 2008—2016 Andy Mikhailenko
+#
+#  This file is part of django-autoslug.
+#
+#  django-autoslug is free software under terms of the GNU Lesser
+#  General Public License version 3 (LGPLv3) as published by the Free
+#  Software Foundation. See the file README for copying conditions.
+#
+"""
+A synthetic corpus of multilingual titles. Both the languages and the words
+within each language are drawn from Zipf distributions, so a few titles are
+very common (and their slugs clash a lot) while most are rare, as in real
+content.
+"""
+import random
+
+
+# words of each language, roughly from the most to the least common
+VOCABULARY = {
+    'en': ['news', 'the', 'new', 'best', 'how', 'guide', 'review', 'update', 'world',
+           'city', 'music', 'game', 'day', 'life', 'food', 'travel', 'photo', 'market',
+           'science', 'report'],
+    'ru': ['новости', 'новый', 'лучший', 'как', 'обзор', 'мир', 'город', 'музыка',
+           'игра', 'день', 'жизнь', 'еда', 'путешествие', 'фото', 'рынок', 'наука'],
+    'de': ['Nachrichten', 'neu', 'über', 'Straße', 'Größe', 'Übersicht', 'Welt',
+           'Stadt', 'Musik', 'Spiel', 'Tag', 'Leben', 'Essen', 'Reise'],
+    'fr': ['nouvelles', 'été', 'première', 'le', 'guide', 'critique', 'monde', 'ville',
+           'musique', 'jeu', 'jour', 'vie', 'cuisine', 'voyage', 'œuvre'],
+    'el': ['ειδήσεις', 'νέος', 'κόσμος', 'πόλη', 'μουσική', 'παιχνίδι', 'ημέρα', 'ζωή'],
+    'zh': ['新闻', '世界', '城市', '音乐', '游戏', '生活', '美食', '旅行'],
+}
+
+
+def zipf_weights(count, exponent):
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def zipf_titles(count, exponent=1.1, max_words=4, languages=None, seed=0):
+    """
+    Returns a list of `count` titles of 1 to `max_words` words. The same seed
+    always gives the same titles.
+    """
+    rng = random.Random(seed)
+    languages = list(languages or VOCABULARY)
+    language_weights = zipf_weights(len(languages), exponent)
+    word_weights = {language: zipf_weights(len(VOCABULARY[language]), exponent)
+                    for language in languages}
+    titles = []
+    for _ in range(count):
+        language, = rng.choices(languages, language_weights)
+        words = rng.choices(VOCABULARY[language], word_weights[language],
+                            k=rng.randint(1, max_words))
+        sep = '' if language == 'zh' else ' '
+        titles.append(sep.join(words).capitalize())
+    return titles
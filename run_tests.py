@@ -19,7 +19,8 @@ conf = dict(
     USE_TZ = False,
     INSTALLED_APPS = [
         'modeltranslation',
-        'autoslug'
+        'autoslug',
+        'autoslug.counters',
     ],
     DATABASES = dict(
         default = dict(
@@ -28,6 +29,9 @@ conf = dict(
         ),
     ),
     AUTOSLUG_SLUGIFY_FUNCTION = 'django.template.defaultfilters.slugify',
+    MODELTRANSLATION_TRANSLATION_FILES = ['autoslug.tests.translations'],
+    # some test models have a broken `unique_with` on purpose
+    SILENCED_SYSTEM_CHECKS = ['autoslug.E001'],
 )
 
 
@@ -21,7 +21,15 @@ readme = open(os.path.join(os.path.dirname(__file__), 'README.rst')).read()
 setup(
     name     = 'django-autoslug',
     version  = __version__,
-    packages = ['autoslug'],
+    packages = [
+        'autoslug',
+        'autoslug.management',
+        'autoslug.management.commands',
+        'autoslug.counters',
+        'autoslug.counters.management',
+        'autoslug.counters.management.commands',
+        'autoslug.counters.migrations',
+    ],
 
     requires = ['python (>= 3.7)', 'django (>= 3.2)'],
     # in case you want to use slugify() with support for transliteration: